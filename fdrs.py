@@ -5,23 +5,31 @@ Simulates DRS functionality with anti-affinity groups based on VM name prefixes.
 """
 
 import argparse
+import atexit
 import getpass
 import logging
+import logging.handlers
+import os
+import queue
 import sys
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional
 
+# Only the lightweight modules are imported eagerly; the planner stack
+# (ResourceMonitor, ClusterState, MigrationManager, ...) pulls in pyVmomi type
+# definitions and is imported lazily inside the functions that need it, so
+# --help and argument errors return without paying that import cost.
 from modules.banner import print_banner
 from modules.config_loader import ConfigLoader
 from modules.connection_manager import ConnectionManager
-from modules.resource_monitor import ResourceMonitor
-from modules.constraint_manager import ConstraintManager
-from modules.cluster_state import ClusterState
-from modules.load_evaluator import LoadEvaluator
-from modules.migration_planner import MigrationManager
-from modules.scheduler import Scheduler
 
 logger = logging.getLogger('fdrs')
 
+# PID that last configured logging; forked workers inherit the root handlers
+# but not the QueueListener thread, so they must rebuild (see _setup_logging).
+_logging_pid: Optional[int] = None
+
 def parse_args():
     """
     Parse the command-line arguments.
@@ -40,170 +48,271 @@ def parse_args():
     parser.add_argument("--max-migrations",type=int,default=None, help="Maximum total migrations to perform in a single run (default: MigrationManager's internal default)")
     parser.add_argument("--iterative", action="store_true", help="Enable iterative planning mode for guaranteed convergence (AA satisfaction + balanced cluster)")
     parser.add_argument("--max-iterations", type=int, default=3, help="Maximum number of planning iterations when --iterative is enabled (default: 3)")
+    parser.add_argument("--iterative-tol", type=float, default=0.02, help="Relative max-min load gap improvement below which iterative planning exits early (default: 0.02)")
+    parser.add_argument("--store-password", action="store_true", help="Store the vCenter password in the system keyring (service 'fdrs') and exit")
 
     return parser.parse_args()
 
-def main():
-    print_banner()
-    args = parse_args()
+def _setup_logging():
+    """Configure logging. Called in the main process and again in each worker process.
 
-    # Validate flag conflicts
-    if args.apply_anti_affinity and args.ignore_anti_affinity:
-        logger.warning("[Main] Conflicting flags detected: --apply-anti-affinity and --ignore-anti-affinity cannot be used together.")
-        logger.warning("[Main] Reason: --apply-anti-affinity enforces anti-affinity rules, --ignore-anti-affinity disables them.")
-        logger.warning("[Main] Resolution: Ignoring --ignore-anti-affinity flag. Running in anti-affinity-only mode.")
-        args.ignore_anti_affinity = False
+    Log records are pushed onto an in-process queue and written to stdout by a
+    background QueueListener thread, so logger calls on the planning hot path
+    never block on stdout writes.
+    """
+    global _logging_pid
+    root = logging.getLogger()
+    if root.handlers:
+        if _logging_pid == os.getpid():
+            return  # Already configured in this process
+        # Forked worker: the inherited QueueHandler points at the parent's
+        # queue, whose listener thread did not survive the fork, so records
+        # would vanish. Drop the inherited handlers and rebuild from scratch.
+        root.handlers.clear()
 
-    if not args.password:
-        args.password = getpass.getpass("vCenter Password: ")
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(
+        fmt='%(asctime)s [%(levelname)s] [%(name)s] %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    ))
+
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    _logging_pid = os.getpid()
 
-    # Configure logging based on config file or defaults
-    log_level = logging.INFO
-    logging.basicConfig(
-        level=log_level,
-        format='%(asctime)s [%(levelname)s] [%(name)s] %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S',
-        handlers=[logging.StreamHandler(sys.stdout)]
-    )
     # Reduce noise from pyvmomi
     logging.getLogger('urllib3').setLevel(logging.WARNING)
     logging.getLogger('pyVmomi').setLevel(logging.WARNING)
-    
-    # Load configuration
-    logger.info("[Main] Loading configuration...")
-    config = ConfigLoader('config/fdrs_config.yaml')
-    config.log_config()
-    
-    logger.info(f"[Main] Starting FDRS...")
-    logger.info(f"[Main] Iterative mode: {'ENABLED' if args.iterative else 'disabled'}")
-    if args.iterative:
-        logger.info(f"[Main] Maximum iterations: {args.max_iterations}")
-    
+
+def _keyring_account(args) -> str:
+    """Keyring account name for the vCenter credentials."""
+    return f"{args.username}@{args.vcenter}"
+
+def _resolve_password(args) -> str:
+    """
+    Resolve the vCenter password without blocking unattended runs:
+    --password flag, then the system keyring (service 'fdrs'), then an
+    interactive prompt only when stdin is a TTY.
+    """
+    if args.password:
+        return args.password
+
+    try:
+        import keyring
+        stored = keyring.get_password('fdrs', _keyring_account(args))
+        if stored:
+            logger.info("[Main] Using vCenter password from system keyring.")
+            return stored
+    except ImportError:
+        logger.debug("[Main] keyring library not available; skipping keyring lookup.")
+    except Exception as e:
+        logger.warning(f"[Main] Keyring lookup failed: {e}")
+
+    if sys.stdin.isatty():
+        return getpass.getpass("vCenter Password: ")
+
+    logger.error("[Main] No password provided, none found in keyring, and stdin is not a TTY. "
+                 "Use --store-password once to store credentials for unattended runs.")
+    sys.exit(1)
+
+def _store_password(args) -> None:
+    """Handle --store-password: save the credential in the keyring and exit."""
+    try:
+        import keyring
+    except ImportError:
+        logger.error("[Main] --store-password requires the 'keyring' library (pip install keyring).")
+        sys.exit(1)
+
+    password = args.password or getpass.getpass("vCenter Password to store: ")
+    keyring.set_password('fdrs', _keyring_account(args), password)
+    logger.info(f"[Main] Password stored in keyring for '{_keyring_account(args)}'.")
+
+def _plan_for_cluster(cluster_name: Optional[str], args, config) -> int:
+    """
+    Run the full FDRS pipeline (metrics, constraints, planning, execution) for a
+    single cluster. Designed to be safe for ProcessPoolExecutor workers: builds
+    its own ConnectionManager/ClusterState and executes planned migrations with
+    its own Scheduler, since pyVmomi managed objects cannot cross process
+    boundaries.
+
+    Returns the number of migrations planned for the cluster.
+    """
+    from modules.resource_monitor import ResourceMonitor
+    from modules.constraint_manager import ConstraintManager
+    from modules.cluster_state import ClusterState
+    from modules.load_evaluator import LoadEvaluator, ALL_METRICS_MASK, build_metrics_mask
+    from modules.migration_planner import MigrationManager
+    from modules.scheduler import Scheduler
+
+    _setup_logging()
+    cluster_label = cluster_name if cluster_name else "all clusters"
+
     connection_manager = ConnectionManager(args.vcenter, args.username, args.password)
     service_instance = connection_manager.connect()
 
-    resource_monitor = ResourceMonitor(service_instance, config=config)
-    cluster_state = ClusterState(service_instance, cluster_name=args.cluster if args.cluster else None)
-    
-    if args.cluster:
-        logger.info(f"[Main] Targeting cluster: '{args.cluster}'")
-    else:
-        logger.info("[Main] Targeting all clusters in vCenter")
-    
-    cluster_state.update_metrics(resource_monitor)
-    state = cluster_state.get_cluster_state()
-
-    if args.apply_anti_affinity:
-        logger.info("Applying anti-affinity rules only (with relaxed resource checks)...")
-        constraint_manager = ConstraintManager(cluster_state, config=config)
-        constraint_manager.apply()
-        load_evaluator = LoadEvaluator(state['hosts']) 
-        migration_planner = MigrationManager(
-            cluster_state,
-            constraint_manager,
-            load_evaluator,
-            aggressiveness=args.aggressiveness,
-            max_total_migrations=args.max_migrations,
-            ignore_anti_affinity=False,  # Always enforce anti-affinity in AA-only mode
-            anti_affinity_only=True  # Skip resource checks entirely for pure distribution
-        )
-        
-        if args.iterative:
-            logger.info(f"[Main] Planning with iterative mode ({args.max_iterations} max iterations)...")
-            migrations = migration_planner.plan_migrations_iterative(
-                max_iterations=args.max_iterations,
-                anti_affinity_only=True
-            )
+    cluster_state = None
+    try:
+        cluster_state = ClusterState(service_instance, cluster_name=cluster_name)
+        logger.info(f"[Main] Targeting cluster: '{cluster_label}'")
+
+        # Single data-driven dispatch for the three planning modes; the planner
+        # objects are constructed exactly once regardless of mode.
+        if args.apply_anti_affinity:
+            mode = 'aa_only'
+            logger.info("Applying anti-affinity rules only (with relaxed resource checks)...")
+        elif args.balance:
+            mode = 'balance'
+            logger.info(f"Auto-balancing cluster using metrics: {args.metrics}")
         else:
-            migrations = migration_planner.plan_migrations(anti_affinity_only=True)
-        
-        if migrations:
-            scheduler = Scheduler(connection_manager, dry_run=args.dry_run)
-            scheduler.execute_migrations(migrations)
+            mode = 'default'
+            logger.info("Running default FDRS workflow (evaluating load and planning migrations if needed)...")
+
+        mode_cfg = {
+            # AA-only mode always enforces anti-affinity and skips resource checks,
+            # evaluation and the perf-counter pull entirely (pure name-based distribution)
+            'aa_only': {'anti_affinity_only': True, 'metrics_mask': ALL_METRICS_MASK, 'evaluate': False,
+                        'collect_metrics': False, 'ignore_anti_affinity': False},
+            'balance': {'anti_affinity_only': False, 'evaluate': True, 'collect_metrics': True,
+                        # Parse the --metrics CSV exactly once into an integer bitmask
+                        'metrics_mask': build_metrics_mask(m.strip() for m in args.metrics.split(",") if m.strip()),
+                        'ignore_anti_affinity': args.ignore_anti_affinity},
+            'default': {'anti_affinity_only': False, 'metrics_mask': ALL_METRICS_MASK, 'evaluate': True,
+                        'collect_metrics': True, 'ignore_anti_affinity': args.ignore_anti_affinity},
+        }[mode]
+
+        if mode_cfg['collect_metrics']:
+            resource_monitor = ResourceMonitor(service_instance, config=config)
+            cluster_state.update_metrics(resource_monitor)
         else:
-            logger.info("No anti-affinity migrations needed.")
-        connection_manager.disconnect()
-        return
+            logger.info("[Main] Skipping perf-counter collection (not needed for anti-affinity-only mode).")
+        state = cluster_state.get_cluster_state()
 
-    if args.balance:
-        logger.info(f"Auto-balancing cluster using metrics: {args.metrics}")
-        metrics_list = [m.strip() for m in args.metrics.split(",") if m.strip()]
-        
         load_evaluator = LoadEvaluator(state['hosts'])
         constraint_manager = ConstraintManager(cluster_state, config=config)
-
         migration_planner = MigrationManager(
             cluster_state,
             constraint_manager,
             load_evaluator,
             aggressiveness=args.aggressiveness,
             max_total_migrations=args.max_migrations,
-            ignore_anti_affinity=args.ignore_anti_affinity,
-            anti_affinity_only=False  # Regular mode: enforce soft resource checks
+            ignore_anti_affinity=mode_cfg['ignore_anti_affinity'],
+            anti_affinity_only=mode_cfg['anti_affinity_only']
         )
 
-        statistical_imbalance_detected = load_evaluator.evaluate_imbalance(metrics_to_check=metrics_list, aggressiveness=args.aggressiveness)
-        if statistical_imbalance_detected:
-            logger.info("Statistical load imbalance detected by LoadEvaluator. MigrationPlanner will now determine actions.")
-        else:
-            logger.info("LoadEvaluator reports no significant statistical imbalance. MigrationPlanner will still check for individual host overloads and anti-affinity rules.")
+        if mode_cfg['evaluate']:
+            statistical_imbalance_detected = load_evaluator.evaluate_imbalance(
+                metrics_mask=mode_cfg['metrics_mask'], aggressiveness=args.aggressiveness)
+            if statistical_imbalance_detected:
+                logger.info("Statistical load imbalance detected by LoadEvaluator. MigrationPlanner will now determine actions.")
+            else:
+                logger.info("LoadEvaluator reports no significant statistical imbalance. MigrationPlanner will still check for individual host overloads and anti-affinity rules.")
 
         logger.info("Applying constraints before migration planning...")
         constraint_manager.apply()
-        
+
         logger.info("Proceeding with migration planning phase...")
+        # An explicit --iterative always wins over the implicit
+        # aggressiveness-5 fast path
         if args.iterative:
             logger.info(f"[Main] Planning with iterative mode ({args.max_iterations} max iterations)...")
-            migrations = migration_planner.plan_migrations_iterative(max_iterations=args.max_iterations)
+            migrations = migration_planner.plan_migrations_iterative(
+                max_iterations=args.max_iterations,
+                anti_affinity_only=mode_cfg['anti_affinity_only'],
+                convergence_tolerance=args.iterative_tol
+            )
+        elif args.aggressiveness == 5 and not mode_cfg['anti_affinity_only']:
+            logger.info("[Main] Aggressiveness 5: using fast pairwise-exchange planner...")
+            migrations = migration_planner.plan_migrations_pairwise()
         else:
-            migrations = migration_planner.plan_migrations()
+            migrations = migration_planner.plan_migrations(anti_affinity_only=mode_cfg['anti_affinity_only'])
 
         if migrations:
             logger.info(f"Found {len(migrations)} migration(s) to perform for load balancing and/or anti-affinity.")
-            scheduler = Scheduler(connection_manager, dry_run=args.dry_run)
+            scheduler = Scheduler(connection_manager, dry_run=args.dry_run,
+                                  max_concurrent=config.get_max_concurrent_migrations())
             scheduler.execute_migrations(migrations)
         else:
             logger.info("Migration planning complete. No actionable migrations found or needed at this time.")
-        
+        return len(migrations)
+    finally:
+        if cluster_state is not None:
+            cluster_state.close()
+        connection_manager.disconnect()
+
+def _list_cluster_names(args) -> List[str]:
+    """Cheap initial call to enumerate cluster names before fanning out workers."""
+    from modules.cluster_state import ClusterState
+
+    connection_manager = ConnectionManager(args.vcenter, args.username, args.password)
+    service_instance = connection_manager.connect()
+    cluster_state = None
+    try:
+        cluster_state = ClusterState(service_instance)
+        return cluster_state.list_clusters()
+    finally:
+        if cluster_state is not None:
+            cluster_state.close()
         connection_manager.disconnect()
+
+def main():
+    print_banner()
+    args = parse_args()
+
+    # Configure logging based on config file or defaults
+    _setup_logging()
+
+    if args.store_password:
+        _store_password(args)
         return
 
-    logger.info("Running default FDRS workflow (evaluating load and planning migrations if needed)...")
-    load_evaluator = LoadEvaluator(state['hosts'])
-    constraint_manager = ConstraintManager(cluster_state, config=config)
-    migration_planner = MigrationManager(
-        cluster_state,
-        constraint_manager,
-        load_evaluator,
-        aggressiveness=args.aggressiveness,
-            max_total_migrations=args.max_migrations,
-            ignore_anti_affinity=args.ignore_anti_affinity,
-            anti_affinity_only=False  # Regular mode: enforce soft resource checks
-    )
-
-    statistical_imbalance_detected = load_evaluator.evaluate_imbalance(aggressiveness=args.aggressiveness)
-    if statistical_imbalance_detected:
-        logger.info("Statistical load imbalance detected by LoadEvaluator. MigrationPlanner will now determine actions.")
-    else:
-        logger.info("LoadEvaluator reports no significant statistical imbalance. MigrationPlanner will still check for individual host overloads and anti-affinity rules.")
-    
-    logger.info("Applying constraints before migration planning...")
-    constraint_manager.apply()
-
-    logger.info("Proceeding with migration planning phase...")
+    # Validate flag conflicts
+    if args.apply_anti_affinity and args.ignore_anti_affinity:
+        logger.warning("[Main] Conflicting flags detected: --apply-anti-affinity and --ignore-anti-affinity cannot be used together.")
+        logger.warning("[Main] Reason: --apply-anti-affinity enforces anti-affinity rules, --ignore-anti-affinity disables them.")
+        logger.warning("[Main] Resolution: Ignoring --ignore-anti-affinity flag. Running in anti-affinity-only mode.")
+        args.ignore_anti_affinity = False
+
+    args.password = _resolve_password(args)
+
+    # Load configuration
+    logger.info("[Main] Loading configuration...")
+    config = ConfigLoader('config/fdrs_config.yaml')
+    config.log_config()
+
+    logger.info(f"[Main] Starting FDRS...")
+    logger.info(f"[Main] Iterative mode: {'ENABLED' if args.iterative else 'disabled'}")
     if args.iterative:
-        logger.info(f"[Main] Planning with iterative mode ({args.max_iterations} max iterations)...")
-        migrations = migration_planner.plan_migrations_iterative(max_iterations=args.max_iterations)
-    else:
-        migrations = migration_planner.plan_migrations()
-
-    if migrations:
-        logger.info(f"Found {len(migrations)} migration(s) to perform for load balancing and/or anti-affinity.")
-        scheduler = Scheduler(connection_manager, dry_run=args.dry_run)
-        scheduler.execute_migrations(migrations)
-    else:
-        logger.info("Migration planning complete. No actionable migrations found or needed at this time.")
-    connection_manager.disconnect()
+        logger.info(f"[Main] Maximum iterations: {args.max_iterations}")
+
+    if args.cluster:
+        _plan_for_cluster(args.cluster, args, config)
+        return
+
+    # All-clusters mode: clusters are independent planning problems, so dispatch
+    # one worker process per cluster instead of serializing them.
+    logger.info("[Main] Targeting all clusters in vCenter")
+    cluster_names = _list_cluster_names(args)
+
+    if not cluster_names:
+        logger.warning("[Main] No clusters found in vCenter. Nothing to do.")
+        return
+
+    if len(cluster_names) == 1:
+        _plan_for_cluster(cluster_names[0], args, config)
+        return
+
+    max_workers = min(len(cluster_names), os.cpu_count() or 1)
+    logger.info(f"[Main] Processing {len(cluster_names)} clusters in parallel with {max_workers} workers...")
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(partial(_plan_for_cluster, args=args, config=config), cluster_names))
+
+    total_migrations = sum(results)
+    logger.info(f"[Main] All clusters processed. Total migrations planned across {len(cluster_names)} clusters: {total_migrations}")
 
 if __name__ == "__main__":
     try:
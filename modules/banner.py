@@ -1,16 +1,23 @@
+import sys
+
+
 def print_banner():
+    # Skip the banner for non-interactive runs (cron/systemd timers); it only
+    # pads the journal when no human is watching.
+    if not sys.stdout.isatty():
+        return
+
     banner_text = r"""
 
-            __________________  _____ 
+            __________________  _____
             |  ___|  _  \ ___ \/  ___|
-            | |_  | | | | |_/ /\ `--. 
+            | |_  | | | | |_/ /\ `--.
             |  _| | | | |    /  `--. \
             | |   | |/ /| |\ \ /\__/ /
-            \_|   |___/ \_| \_|\____/ 
-                                
+            \_|   |___/ \_| \_|\____/
+
     F D R S - Fully Dynamic Resource Scheduler
  https://fatihsolen.com - https://github.com/fsolen
 ----------------------------------------------------
     """
     print(banner_text)
-
@@ -1,86 +1,418 @@
 from pyVmomi import vim
 import logging
-from typing import Dict, List, Optional, Any
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Tuple
 
 logger = logging.getLogger('fdrs')
 
+
+@dataclass(slots=True)
+class VMInfo:
+    """Lightweight per-VM record returned by get_cluster_state()."""
+    name: str
+    host: Any = None
+    cpu_usage: float = 0
+    memory_usage: float = 0
+    disk_io_usage: float = 0
+    network_io_usage: float = 0
+
+
+@dataclass(slots=True)
+class HostInfo:
+    """Lightweight per-host record returned by get_cluster_state()."""
+    name: str
+    cpu_usage: float = 0
+    memory_usage: float = 0
+    disk_io_usage: float = 0
+    network_io_usage: float = 0
+    cpu_capacity: float = 0
+    memory_capacity: float = 0
+    disk_io_capacity: float = 0
+    network_capacity: float = 0
+
+# Thread-pool size for fallback per-entity PerfManager queries. pyVmomi's SOAP
+# stub is thread-safe per session; beyond ~16 concurrent requests vCenter
+# throttling eats the gains.
+ANNOTATION_MAX_WORKERS = 16
+
+# TTL for cached container views (seconds). Iterative planning re-instantiates
+# ClusterState with identical view parameters, so short-lived reuse is safe.
+VIEW_TTL_SECONDS = 60
+
+# (service_instance id, type-name tuple, root moId) -> (ContainerView, creation timestamp)
+_view_cache: Dict[Tuple[int, Tuple[str, ...], Optional[str]], Tuple[Any, float]] = {}
+
+# TTL for cached inventory property fetches (seconds). Periodic runs a few
+# minutes apart always refetch; back-to-back ClusterState constructions (e.g.
+# iterative planning) reuse the previous PropertyCollector pass.
+INVENTORY_TTL_SECONDS = 30
+
+# (service_instance id, cluster name) -> (fetch timestamp, inventory dict,
+# whether the fetch was scoped to a cluster root)
+_inventory_cache: Dict[Tuple[int, Optional[str]], Tuple[float, Dict, bool]] = {}
+
+
+def _get_container_view(service_instance, vim_types, content=None, root=None):
+    """
+    Return a (possibly cached) recursive ContainerView for the given
+    managed-object types, rooted at `root` (default: the root folder).
+
+    Views are cached per service instance with a short TTL so repeated
+    inventory scans (e.g. under iterative planning) avoid CreateContainerView
+    churn against vCenter. Expired views are destroyed before being replaced.
+    Pass an already-retrieved ServiceContent to avoid a RetrieveContent call.
+    """
+    root_moid = getattr(root, '_moId', None)
+    cache_key = (id(service_instance), tuple(t.__name__ for t in vim_types), root_moid)
+    now = time.monotonic()
+
+    cached = _view_cache.get(cache_key)
+    if cached is not None:
+        view, created_at = cached
+        if now - created_at < VIEW_TTL_SECONDS:
+            logger.debug(f"[ClusterState] Reusing cached container view for types {cache_key[1]}")
+            return view
+        try:
+            view.Destroy()
+        except Exception as e:
+            logger.debug(f"[ClusterState] Could not destroy expired container view: {e}")
+        del _view_cache[cache_key]
+
+    if content is None:
+        content = service_instance.RetrieveContent()
+    view = content.viewManager.CreateContainerView(root if root is not None else content.rootFolder,
+                                                   list(vim_types), True)
+    _view_cache[cache_key] = (view, now)
+    return view
+
+
+def _destroy_cached_views(service_instance) -> None:
+    """Destroy and drop every cached container view for a service instance."""
+    si_id = id(service_instance)
+    for cache_key in [key for key in _view_cache if key[0] == si_id]:
+        view, _ = _view_cache.pop(cache_key)
+        try:
+            view.Destroy()
+        except Exception as e:
+            logger.debug(f"[ClusterState] Could not destroy container view: {e}")
+
 class ClusterState:
     """Maintains state of cluster VMs, hosts, and their metrics."""
     
-    __slots__ = ('service_instance', 'cluster_name', 'vms', 'hosts', 'vm_metrics', 'host_metrics')
-    
+    __slots__ = ('service_instance', 'cluster_name', 'vms', 'hosts', 'vm_metrics', 'host_metrics',
+                 '_content', '_vms_by_host_moid', '_host_of_vm_moid', '_vms_by_name', '_hosts_by_name',
+                 '_host_vm_rollup', '_inventory_scoped')
+
     def __init__(self, service_instance, cluster_name: Optional[str] = None):
         self.service_instance = service_instance
         self.cluster_name = cluster_name
-        self.vms: List = self._get_all_vms()
-        self.hosts: List = self._get_all_hosts()
+        self._inventory_scoped = False
+        # RetrieveContent is a SOAP call; fetch once and reuse everywhere
+        self._content = service_instance.RetrieveContent()
+        inventory = self._retrieve_inventory()
+        self.vms: List = self._get_all_vms(inventory)
+        self.hosts: List = self._get_all_hosts(inventory)
         self.vm_metrics: Dict[str, Dict] = {}
         self.host_metrics: Dict[str, Dict] = {}
+        # host moId -> [cpu_sum, disk_sum, net_sum, vm_names]; filled as a
+        # by-product of VM annotation so host rollups need no per-host loops
+        self._host_vm_rollup: Dict[str, List] = {}
+        self._build_indexes(inventory)
+
+    def _build_indexes(self, inventory: Dict) -> None:
+        """
+        Precompute lookup indexes from the inventory property fetch so that
+        get_host_of_vm/get_vms_on_host/get_*_by_name are O(1) dict reads
+        instead of linear scans with lazy SOAP attribute walks.
+        """
+        self._vms_by_host_moid: Dict[str, List] = {}
+        self._host_of_vm_moid: Dict[str, Any] = {}
+        self._vms_by_name: Dict[str, Any] = {}
+        self._hosts_by_name: Dict[str, Any] = {}
+
+        hosts_by_moid = {host._moId: host for host in self.hosts}
+        active_vm_moids = {vm._moId for vm in self.vms}
+
+        for vm_obj, props in inventory.get(vim.VirtualMachine, []):
+            if vm_obj._moId not in active_vm_moids:
+                continue
+            vm_name = props.get('name')
+            if vm_name:
+                self._vms_by_name[vm_name] = vm_obj
+            host_ref = props.get('runtime.host')
+            if host_ref is not None and hasattr(host_ref, '_moId'):
+                # Prefer the canonical host object from self.hosts over the raw ref
+                host_obj = hosts_by_moid.get(host_ref._moId, host_ref)
+                self._host_of_vm_moid[vm_obj._moId] = host_obj
+                self._vms_by_host_moid.setdefault(host_ref._moId, []).append(vm_obj)
+
+        for host_obj, props in inventory.get(vim.HostSystem, []):
+            if host_obj._moId in hosts_by_moid and props.get('name'):
+                self._hosts_by_name[props['name']] = host_obj
     
-    def update_metrics(self, resource_monitor) -> None:
-        """Update all VM and host metrics using the provided resource monitor."""
-        self.annotate_vms_with_metrics(resource_monitor)
-        self.annotate_hosts_with_metrics(resource_monitor)
-        self.log_cluster_stats()
+    def close(self) -> None:
+        """
+        Release the container views this instance's connection has cached.
+        Views are reused (not destroyed) between fetches during the run, so
+        call this once when done with the connection, before disconnecting.
+        """
+        _destroy_cached_views(self.service_instance)
 
-    def _get_all_vms(self):
-        """Get all VMs in the datacenter, optionally filtered by cluster."""
-        content = self.service_instance.RetrieveContent()
-        container = content.viewManager.CreateContainerView(
-            content.rootFolder, [vim.VirtualMachine], True
+    def _retrieve_properties(self, spec_map: Dict, root=None) -> Dict:
+        """
+        Fetch properties for one or more managed object types in a single
+        PropertyCollector.RetrievePropertiesEx call instead of per-attribute
+        SOAP fetches.
+
+        Args:
+            spec_map: Dict mapping vim types to the list of property paths to fetch
+                      (e.g. {vim.HostSystem: ['name', 'runtime.connectionState']})
+            root: Optional managed object to root the container view at
+                  (default: the root folder, i.e. the whole inventory)
+
+        Returns:
+            Dict mapping each vim type to a list of (managed_object, {path: value}) tuples.
+        """
+        content = self._content
+        vim_types = list(spec_map.keys())
+        container = _get_container_view(self.service_instance, vim_types, content=content, root=root)
+        results: Dict[Any, List] = {vim_type: [] for vim_type in vim_types}
+        traversal_spec = vim.PropertyCollector.TraversalSpec(
+            name='traverseEntities',
+            path='view',
+            skip=False,
+            type=vim.view.ContainerView
         )
-        vms = container.view
-        container.Destroy()
-        
-        # Filter out templates and powered off VMs
-        active_vms = [vm for vm in vms if not vm.config.template and vm.runtime.powerState == 'poweredOn']
-        
-        # If cluster_name is specified, filter VMs to only those in the specified cluster
-        if self.cluster_name:
-            filtered_vms = []
-            for vm in active_vms:
-                try:
-                    # Get the host this VM is running on, then check the host's cluster
-                    if vm.runtime.host and vm.runtime.host.parent and hasattr(vm.runtime.host.parent, 'name'):
-                        if vm.runtime.host.parent.name == self.cluster_name:
-                            filtered_vms.append(vm)
-                except Exception as e:
-                    logger.debug(f"Could not determine cluster for VM {vm.name}: {e}")
-            
-            return filtered_vms
-        
-        return active_vms
+        object_spec = vim.PropertyCollector.ObjectSpec(
+            obj=container, skip=True, selectSet=[traversal_spec]
+        )
+        property_specs = [
+            vim.PropertyCollector.PropertySpec(type=vim_type, pathSet=path_set)
+            for vim_type, path_set in spec_map.items()
+        ]
+        filter_spec = vim.PropertyCollector.FilterSpec(
+            objectSet=[object_spec], propSet=property_specs
+        )
+        collector = content.propertyCollector
+        options = vim.PropertyCollector.RetrieveOptions(maxObjects=1000)
 
-    def _get_all_hosts(self):
-        """Get all ESXi hosts in the datacenter."""
-        content = self.service_instance.RetrieveContent()
-        container = content.viewManager.CreateContainerView(
-            content.rootFolder, [vim.HostSystem], True
+        response = collector.RetrievePropertiesEx(specSet=[filter_spec], options=options)
+        while response:
+            for obj_content in response.objects:
+                props = {p.name: p.val for p in (obj_content.propSet or [])}
+                for vim_type in vim_types:
+                    if isinstance(obj_content.obj, vim_type):
+                        results[vim_type].append((obj_content.obj, props))
+                        break
+            if response.token:
+                response = collector.ContinueRetrievePropertiesEx(token=response.token)
+            else:
+                break
+        return results
+
+    def _retrieve_object_properties(self, objects: List, vim_type, path_set: List[str],
+                                    max_objects: int = 500) -> Dict[str, Dict]:
+        """
+        Fetch the given property paths for an explicit list of managed objects
+        in one paged RetrievePropertiesEx call (no container traversal).
+
+        Args:
+            objects: Managed objects to query
+            vim_type: The vim type of those objects
+            path_set: Property paths to fetch
+            max_objects: Page size for RetrievePropertiesEx
+
+        Returns:
+            Dict mapping each object's _moId to {path: value}.
+        """
+        if not objects:
+            return {}
+        content = self._content
+        filter_spec = vim.PropertyCollector.FilterSpec(
+            objectSet=[vim.PropertyCollector.ObjectSpec(obj=obj) for obj in objects],
+            propSet=[vim.PropertyCollector.PropertySpec(type=vim_type, pathSet=path_set)]
         )
-        hosts = container.view
-        container.Destroy()
-        
+        collector = content.propertyCollector
+        options = vim.PropertyCollector.RetrieveOptions(maxObjects=max_objects)
+
+        results: Dict[str, Dict] = {}
+        response = collector.RetrievePropertiesEx(specSet=[filter_spec], options=options)
+        while response:
+            for obj_content in response.objects:
+                results[obj_content.obj._moId] = {p.name: p.val for p in (obj_content.propSet or [])}
+            if response.token:
+                response = collector.ContinueRetrievePropertiesEx(token=response.token)
+            else:
+                break
+        return results
+
+    @staticmethod
+    def _build_host_cluster_map(host_props: List, cluster_props: List) -> Dict[str, str]:
+        """Map host moIds to their cluster names from pre-fetched property sets."""
+        cluster_names_by_moid = {
+            cluster_obj._moId: props.get('name')
+            for cluster_obj, props in cluster_props
+        }
+        host_cluster_map = {}
+        for host_obj, props in host_props:
+            parent = props.get('parent')
+            if parent is not None and hasattr(parent, '_moId'):
+                host_cluster_map[host_obj._moId] = cluster_names_by_moid.get(parent._moId)
+        return host_cluster_map
+
+    def _retrieve_inventory(self) -> Dict:
+        """
+        Fetch all VM, host and (when cluster-filtering) cluster properties the
+        inventory scan needs in a single PropertyCollector call, shared by
+        _get_all_vms and _get_all_hosts.
+
+        Results are cached per (connection, cluster) with a short TTL so
+        repeated ClusterState constructions within one planning run skip the
+        PropertyCollector pass; use refresh_inventory() to force a refetch.
+        """
+        cache_key = (id(self.service_instance), self.cluster_name)
+        cached = _inventory_cache.get(cache_key)
+        if cached is not None:
+            fetched_at, inventory, scoped = cached
+            if time.monotonic() - fetched_at < INVENTORY_TTL_SECONDS:
+                logger.debug(f"[ClusterState] Reusing cached inventory for cluster '{self.cluster_name}'")
+                self._inventory_scoped = scoped
+                return inventory
+            del _inventory_cache[cache_key]
+
+        # When a cluster is targeted, root the view at that cluster so the
+        # traversal only covers its VMs/hosts instead of the whole datacenter
+        cluster_root = self._find_cluster_obj() if self.cluster_name else None
+
+        spec_map = {
+            vim.VirtualMachine: ['name', 'config.template', 'runtime.powerState', 'runtime.host'],
+            vim.HostSystem: ['name', 'runtime.connectionState', 'parent'],
+        }
+        if self.cluster_name and cluster_root is None:
+            # Datacenter-wide fallback still needs cluster names for filtering
+            spec_map[vim.ClusterComputeResource] = ['name']
+
+        inventory = self._retrieve_properties(spec_map, root=cluster_root)
+        self._inventory_scoped = cluster_root is not None
+        _inventory_cache[cache_key] = (time.monotonic(), inventory, self._inventory_scoped)
+        return inventory
+
+    def _find_cluster_obj(self):
+        """
+        Locate the ClusterComputeResource matching cluster_name with one small
+        name-only property fetch. Returns None (triggering the datacenter-wide
+        scan fallback) if the cluster cannot be found.
+        """
+        try:
+            results = self._retrieve_properties({vim.ClusterComputeResource: ['name']})
+        except Exception as e:
+            logger.warning(f"[ClusterState] Could not look up cluster '{self.cluster_name}': {e}. "
+                           f"Falling back to datacenter-wide scan.")
+            return None
+        for cluster_obj, props in results.get(vim.ClusterComputeResource, []):
+            if props.get('name') == self.cluster_name:
+                return cluster_obj
+        logger.warning(f"[ClusterState] Cluster '{self.cluster_name}' not found in inventory. "
+                       f"Falling back to datacenter-wide scan.")
+        return None
+
+    def refresh_inventory(self) -> None:
+        """
+        Force a fresh inventory fetch, bypassing the TTL cache, and rebuild
+        the VM/host lists and lookup indexes from the new data.
+        """
+        _inventory_cache.pop((id(self.service_instance), self.cluster_name), None)
+        inventory = self._retrieve_inventory()
+        self.vms = self._get_all_vms(inventory)
+        self.hosts = self._get_all_hosts(inventory)
+        self._build_indexes(inventory)
+
+    def _get_all_vms(self, inventory: Optional[Dict] = None):
+        """Get all VMs in the datacenter, optionally filtered by cluster.
+
+        Uses a single PropertyCollector retrieval (shared with _get_all_hosts
+        when called from __init__) for the template/power-state/cluster filters
+        instead of per-VM lazy attribute fetches.
+        """
+        results = inventory if inventory is not None else self._retrieve_inventory()
+
+        # When the inventory view is rooted at the cluster, everything returned
+        # already belongs to it and no client-side cluster filtering is needed
+        needs_cluster_filter = bool(self.cluster_name) and not self._inventory_scoped
+
+        host_cluster_map = {}
+        if needs_cluster_filter:
+            host_cluster_map = self._build_host_cluster_map(
+                results.get(vim.HostSystem, []), results.get(vim.ClusterComputeResource, [])
+            )
+
+        active_vms = []
+        for vm, props in results.get(vim.VirtualMachine, []):
+            # Filter out templates and powered off VMs
+            if props.get('config.template', False):
+                continue
+            if props.get('runtime.powerState') != 'poweredOn':
+                continue
+
+            # If cluster_name is specified, filter VMs to only those in the specified cluster
+            if needs_cluster_filter:
+                vm_host = props.get('runtime.host')
+                if vm_host is None or not hasattr(vm_host, '_moId'):
+                    logger.debug(f"Could not determine cluster for VM {props.get('name')}: no host reference")
+                    continue
+                if host_cluster_map.get(vm_host._moId) != self.cluster_name:
+                    continue
+
+            active_vms.append(vm)
+
+        return active_vms
+
+    def _get_all_hosts(self, inventory: Optional[Dict] = None):
+        """Get all ESXi hosts in the datacenter.
+
+        Uses a single PropertyCollector retrieval (shared with _get_all_vms
+        when called from __init__) for the connection-state and cluster filters
+        instead of per-host lazy attribute fetches.
+        """
+        results = inventory if inventory is not None else self._retrieve_inventory()
+        host_props = results.get(vim.HostSystem, [])
+
         # Filter out hosts that are not in connected state
-        connected_hosts = [host for host in hosts if host.runtime.connectionState == 'connected']
-        
-        # If cluster_name is specified, filter by cluster
-        if self.cluster_name:
-            filtered_hosts = []
-            for host in connected_hosts:
-                try:
-                    if host.parent and hasattr(host.parent, 'name') and host.parent.name == self.cluster_name:
-                        filtered_hosts.append(host)
-                except Exception as e:
-                    logger.debug(f"Could not determine cluster for host {host.name}: {e}")
-            
+        connected_hosts = [
+            (host, props) for host, props in host_props
+            if props.get('runtime.connectionState') == 'connected'
+        ]
+
+        # If cluster_name is specified, filter by cluster (skipped when the
+        # inventory view was already rooted at the cluster)
+        if self.cluster_name and not self._inventory_scoped:
+            host_cluster_map = self._build_host_cluster_map(
+                host_props, results.get(vim.ClusterComputeResource, [])
+            )
+            filtered_hosts = [
+                host for host, props in connected_hosts
+                if host_cluster_map.get(host._moId) == self.cluster_name
+            ]
+
             if not filtered_hosts:
                 logger.warning(f"[ClusterState] No hosts found in cluster '{self.cluster_name}'")
             else:
                 logger.info(f"[ClusterState] Filtered to {len(filtered_hosts)} hosts in cluster '{self.cluster_name}'")
-            
+
             return filtered_hosts
-        
-        return connected_hosts
+
+        return [host for host, _ in connected_hosts]
+
+    def list_clusters(self) -> List[str]:
+        """Return the names of all clusters in the vCenter (cheap inventory-only call)."""
+        container = _get_container_view(self.service_instance, [vim.ClusterComputeResource], content=self._content)
+        clusters = container.view
+
+        cluster_names = [c.name for c in clusters if hasattr(c, 'name')]
+        logger.info(f"[ClusterState] Found {len(cluster_names)} cluster(s) in vCenter: {cluster_names}")
+        return cluster_names
 
     def get_cluster_state(self):
         """
@@ -91,9 +423,11 @@ class ClusterState:
             self.vms = self._get_all_vms()
             self.hosts = self._get_all_hosts()
             
+        # Preallocate the result lists; index assignment avoids list-growth
+        # reallocations for clusters with thousands of entities
         cluster_state = {
-            'vms': [],
-            'hosts': [],
+            'vms': [None] * len(self.vms),
+            'hosts': [None] * len(self.hosts),
             'total_metrics': {
                 'cpu_usage': 0,
                 'memory_usage': 0,
@@ -102,38 +436,49 @@ class ClusterState:
             }
         }
 
-        # Aggregate VM metrics
-        for vm_obj in self.vms:
+        # Aggregate VM metrics; totals are accumulated in locals during the
+        # same pass instead of a per-VM getattr loop over the record fields
+        total_cpu = total_mem = total_disk = total_net = 0
+        vm_infos = cluster_state['vms']
+        for index, vm_obj in enumerate(self.vms):
             vm_metrics_data = self.vm_metrics.get(vm_obj.name, {})
-            vm_info = {
-                'name': vm_obj.name,
-                'host': self.get_host_of_vm(vm_obj),
-                'cpu_usage': vm_metrics_data.get('cpu_usage_abs', 0),
-                'memory_usage': vm_metrics_data.get('memory_usage_abs', 0),
-                'disk_io_usage': vm_metrics_data.get('disk_io_usage_abs', 0),
-                'network_io_usage': vm_metrics_data.get('network_io_usage_abs', 0)
-            }
-            cluster_state['vms'].append(vm_info)
-            
-            # Add to totals using the same keys
-            for metric_key in ['cpu_usage', 'memory_usage', 'disk_io_usage', 'network_io_usage']:
-                cluster_state['total_metrics'][metric_key] += vm_info[metric_key]
+            cpu_usage = vm_metrics_data.get('cpu_usage_abs', 0)
+            memory_usage = vm_metrics_data.get('memory_usage_abs', 0)
+            disk_io_usage = vm_metrics_data.get('disk_io_usage_abs', 0)
+            network_io_usage = vm_metrics_data.get('network_io_usage_abs', 0)
+            vm_infos[index] = VMInfo(
+                name=vm_obj.name,
+                host=self.get_host_of_vm(vm_obj),
+                cpu_usage=cpu_usage,
+                memory_usage=memory_usage,
+                disk_io_usage=disk_io_usage,
+                network_io_usage=network_io_usage
+            )
+            total_cpu += cpu_usage
+            total_mem += memory_usage
+            total_disk += disk_io_usage
+            total_net += network_io_usage
+
+        cluster_state['total_metrics']['cpu_usage'] = total_cpu
+        cluster_state['total_metrics']['memory_usage'] = total_mem
+        cluster_state['total_metrics']['disk_io_usage'] = total_disk
+        cluster_state['total_metrics']['network_io_usage'] = total_net
 
         # Aggregate host metrics
-        for host_obj in self.hosts: # Renamed host to host_obj
+        host_infos = cluster_state['hosts']
+        for index, host_obj in enumerate(self.hosts): # Renamed host to host_obj
             host_metrics_data = self.host_metrics.get(host_obj.name, {})
-            host_info = {
-                'name': host_obj.name,
-                'cpu_usage': host_metrics_data.get('cpu_usage', 0),
-                'memory_usage': host_metrics_data.get('memory_usage', 0),
-                'disk_io_usage': host_metrics_data.get('disk_io_usage', 0),
-                'network_io_usage': host_metrics_data.get('network_io_usage', 0),
-                'cpu_capacity': host_metrics_data.get('cpu_capacity', 0),
-                'memory_capacity': host_metrics_data.get('memory_capacity', 0),
-                'disk_io_capacity': host_metrics_data.get('disk_io_capacity', 0),
-                'network_capacity': host_metrics_data.get('network_capacity', 0)
-            }
-            cluster_state['hosts'].append(host_info)
+            host_infos[index] = HostInfo(
+                name=host_obj.name,
+                cpu_usage=host_metrics_data.get('cpu_usage', 0),
+                memory_usage=host_metrics_data.get('memory_usage', 0),
+                disk_io_usage=host_metrics_data.get('disk_io_usage', 0),
+                network_io_usage=host_metrics_data.get('network_io_usage', 0),
+                cpu_capacity=host_metrics_data.get('cpu_capacity', 0),
+                memory_capacity=host_metrics_data.get('memory_capacity', 0),
+                disk_io_capacity=host_metrics_data.get('disk_io_capacity', 0),
+                network_capacity=host_metrics_data.get('network_capacity', 0)
+            )
 
         return cluster_state
         
@@ -141,9 +486,17 @@ class ClusterState:
         """
         Given a VM object, return the name of the host it is running on.
         """
+        vm_moid = getattr(vm_object, '_moId', None)
+        indexed_host = self._host_of_vm_moid.get(vm_moid)
+        if indexed_host is not None:
+            return indexed_host
         try:
             # Use vm_object consistently
             if hasattr(vm_object, 'runtime') and hasattr(vm_object.runtime, 'host') and vm_object.runtime.host:
+                # Memoize the fallback read so repeated lookups for the same
+                # VM within a run cost one SOAP fetch, not one per call.
+                if vm_moid is not None:
+                    self._host_of_vm_moid[vm_moid] = vm_object.runtime.host
                 return vm_object.runtime.host
             else:
                 logger.warning(f"VM '{vm_object.name}' does not have a valid host reference.")
@@ -152,55 +505,108 @@ class ClusterState:
             logger.error(f"Error getting host for VM '{getattr(vm_object, 'name', str(vm_object))}': {e}")
             return None
 
-    def annotate_vms_with_metrics(self, resource_monitor):
+    def annotate_vms_with_metrics(self, resource_monitor, batch_io_metrics=None):
         """
         Build a dictionary mapping VM names to their absolute resource consumption metrics.
         These metrics represent actual resource usage that will be used to calculate host loads.
-        
-        Uses batch queries for I/O metrics (more efficient) and vm.summary.quickStats 
-        for absolute CPU/Memory.
+
+        Uses batch queries for I/O metrics (more efficient) and vm.summary.quickStats
+        for absolute CPU/Memory. A prebuilt batch_io_metrics map (e.g. from
+        resource_monitor.get_metrics_bulk) skips the batch query entirely.
         """
         self.vm_metrics = {}
         logger.info("[ClusterState] Starting annotation of VMs with metrics...")
         
-        # Filter valid VMs first
+        # Filter valid VMs first. self.vms is already template/power-filtered
+        # from the inventory batch; resolve names from the index built off that
+        # same batch so this pass does not trigger lazy per-VM name fetches.
+        name_by_moid = {vm._moId: name for name, vm in self._vms_by_name.items()}
         valid_vms = []
         for vm_obj in self.vms:
-            vm_name = getattr(vm_obj, 'name', None)
+            if not hasattr(vm_obj, '_moId') or vm_obj._moId is None:
+                logger.warning(f"[ClusterState.annotate_vms] VM {getattr(vm_obj, 'name', 'Unknown')} has missing _moId. Skipping.")
+                continue
+            vm_name = name_by_moid.get(vm_obj._moId) or getattr(vm_obj, 'name', None)
             if not vm_name:
                 logger.warning("[ClusterState.annotate_vms] VM without name skipped")
                 continue
-            if not hasattr(vm_obj, '_moId') or vm_obj._moId is None:
-                logger.warning(f"[ClusterState.annotate_vms] VM {vm_name} has missing _moId. Skipping.")
-                continue
             valid_vms.append(vm_obj)
         
-        # Use batch query for I/O metrics (disk and network)
-        batch_io_metrics = {}
-        if hasattr(resource_monitor, 'get_batch_vm_metrics'):
-            try:
-                batch_io_metrics = resource_monitor.get_batch_vm_metrics(valid_vms)
-                logger.debug(f"[ClusterState] Batch query returned metrics for {len(batch_io_metrics)} VMs")
-            except Exception as e:
-                logger.warning(f"[ClusterState] Batch query failed: {e}. Falling back to individual queries.")
-        
-        # Process each VM
+        # Fetch quickStats for all VMs in one PropertyCollector call instead of
+        # two lazy attribute reads (SOAP round trips) per VM
+        quickstats_by_moid = {}
+        try:
+            quickstats_by_moid = self._retrieve_object_properties(
+                valid_vms, vim.VirtualMachine,
+                ['summary.quickStats.overallCpuUsage', 'summary.quickStats.guestMemoryUsage'])
+        except Exception as e:
+            logger.warning(f"[ClusterState] Batch quickStats query failed: {e}. Falling back to per-VM reads.")
+
+        # Use batch query for I/O metrics (disk and network) unless a prebuilt
+        # map was handed in
+        if batch_io_metrics is not None:
+            batch_io_metrics = dict(batch_io_metrics)
+        else:
+            batch_io_metrics = {}
+            if hasattr(resource_monitor, 'get_batch_vm_metrics'):
+                try:
+                    batch_io_metrics = resource_monitor.get_batch_vm_metrics(valid_vms)
+                    logger.debug(f"[ClusterState] Batch query returned metrics for {len(batch_io_metrics)} VMs")
+                except Exception as e:
+                    logger.warning(f"[ClusterState] Batch query failed: {e}. Falling back to individual queries.")
+
+        # Fan out any remaining per-VM queries concurrently; they are
+        # independent network-bound PerfManager calls
+        fallback_vms = [vm for vm in valid_vms
+                        if (name_by_moid.get(vm._moId) or vm.name) not in batch_io_metrics]
+        if fallback_vms:
+            logger.info(f"[ClusterState] Fetching I/O metrics for {len(fallback_vms)} VM(s) individually "
+                        f"({ANNOTATION_MAX_WORKERS} workers)...")
+            with ThreadPoolExecutor(max_workers=ANNOTATION_MAX_WORKERS) as pool:
+                future_map = {pool.submit(resource_monitor.get_vm_metrics, vm): vm for vm in fallback_vms}
+                for future in as_completed(future_map):
+                    vm_obj = future_map[future]
+                    try:
+                        batch_io_metrics[vm_obj.name] = future.result()
+                    except Exception as e:
+                        logger.error(f"[ClusterState.annotate_vms] Individual metrics query failed for "
+                                     f"VM '{vm_obj.name}': {e}")
+
+        # Process each VM, accumulating the per-host columnar rollup
+        # (cpu/disk/net sums plus VM names) in the same pass
+        self._host_vm_rollup = {}
         for vm_obj in valid_vms:
-            vm_name = vm_obj.name
+            vm_name = name_by_moid.get(vm_obj._moId) or vm_obj.name
             try:
-                # Get I/O metrics from batch result or fall back to individual query
-                if vm_name in batch_io_metrics:
-                    io_metrics = batch_io_metrics[vm_name]
-                else:
-                    io_metrics = resource_monitor.get_vm_metrics(vm_obj)
+                # Batch result, topped up by the concurrent fallback queries above.
+                # A VM still missing here had its individual query fail too.
+                io_metrics = batch_io_metrics.get(vm_name, {})
                 
+                quickstats = quickstats_by_moid.get(vm_obj._moId)
+                if quickstats is not None:
+                    cpu_usage_abs = quickstats.get('summary.quickStats.overallCpuUsage') or 0
+                    memory_usage_abs = quickstats.get('summary.quickStats.guestMemoryUsage') or 0
+                else:
+                    cpu_usage_abs = vm_obj.summary.quickStats.overallCpuUsage or 0
+                    memory_usage_abs = vm_obj.summary.quickStats.guestMemoryUsage or 0
+
+                disk_io_usage_abs = io_metrics.get('disk_io_usage', 0.0)
+                network_io_usage_abs = io_metrics.get('network_io_usage', 0.0)
                 self.vm_metrics[vm_name] = {
-                    'cpu_usage_abs': vm_obj.summary.quickStats.overallCpuUsage or 0,
-                    'memory_usage_abs': vm_obj.summary.quickStats.guestMemoryUsage or 0,
-                    'disk_io_usage_abs': io_metrics.get('disk_io_usage', 0.0),
-                    'network_io_usage_abs': io_metrics.get('network_io_usage', 0.0),
+                    'cpu_usage_abs': cpu_usage_abs,
+                    'memory_usage_abs': memory_usage_abs,
+                    'disk_io_usage_abs': disk_io_usage_abs,
+                    'network_io_usage_abs': network_io_usage_abs,
                     'vm_obj': vm_obj
                 }
+
+                host_obj = self._host_of_vm_moid.get(vm_obj._moId)
+                if host_obj is not None:
+                    rollup = self._host_vm_rollup.setdefault(host_obj._moId, [0, 0.0, 0.0, []])
+                    rollup[0] += cpu_usage_abs
+                    rollup[1] += disk_io_usage_abs
+                    rollup[2] += network_io_usage_abs
+                    rollup[3].append(vm_name)
             except AttributeError as ae:
                 logger.error(f"[ClusterState.annotate_vms] AttributeError for VM '{vm_name}': {ae}")
                 continue 
@@ -210,28 +616,86 @@ class ClusterState:
 
         logger.info(f"[ClusterState] Finished annotation of {len(self.vm_metrics)} VMs with metrics.")
 
-    def annotate_hosts_with_metrics(self, resource_monitor):
+    def annotate_hosts_with_metrics(self, resource_monitor, batch_host_metrics=None,
+                                    batch_host_props=None):
         """
         Calculate host metrics by summing the resource consumption of VMs running on each host.
         Also incorporates capacity information obtained directly or via ResourceMonitor for consistency.
+        A prebuilt batch_host_metrics map (e.g. from resource_monitor.get_metrics_bulk)
+        skips the batch query entirely; batch_host_props likewise skips the
+        quickStats/parent PropertyCollector fetch (update_metrics prefetches
+        it concurrently with VM annotation).
         """
         self.host_metrics = {}
         logger.info("[ClusterState] Starting annotation of hosts with metrics...")
+
+        # Fetch host quickStats and parent refs in one PropertyCollector call
+        # instead of lazy per-host attribute reads
+        if batch_host_props is not None:
+            host_props_by_moid = batch_host_props
+        else:
+            host_props_by_moid = {}
+            try:
+                host_props_by_moid = self._retrieve_object_properties(
+                    self.hosts, vim.HostSystem,
+                    ['summary.quickStats.overallMemoryUsage', 'parent'])
+            except Exception as e:
+                logger.warning(f"[ClusterState] Batch host quickStats query failed: {e}. Falling back to per-host reads.")
+
+        # Use batch query for host usage/capacity metrics (one QueryPerf round
+        # trip) unless a prebuilt map was handed in
+        if batch_host_metrics is not None:
+            batch_host_metrics = dict(batch_host_metrics)
+        else:
+            batch_host_metrics = {}
+            if hasattr(resource_monitor, 'get_batch_host_metrics'):
+                try:
+                    batch_host_metrics = resource_monitor.get_batch_host_metrics(self.hosts)
+                    logger.debug(f"[ClusterState] Batch query returned metrics for {len(batch_host_metrics)} hosts")
+                except Exception as e:
+                    logger.warning(f"[ClusterState] Batch host query failed: {e}. Falling back to individual queries.")
+
+        # Fan out any remaining per-host queries concurrently
+        fallback_hosts = [host for host in self.hosts
+                          if getattr(host, 'name', None) and host.name not in batch_host_metrics]
+        if fallback_hosts:
+            logger.info(f"[ClusterState] Fetching metrics for {len(fallback_hosts)} host(s) individually "
+                        f"({ANNOTATION_MAX_WORKERS} workers)...")
+            with ThreadPoolExecutor(max_workers=ANNOTATION_MAX_WORKERS) as pool:
+                future_map = {pool.submit(resource_monitor.get_host_metrics, host): host for host in fallback_hosts}
+                for future in as_completed(future_map):
+                    host_obj = future_map[future]
+                    try:
+                        batch_host_metrics[host_obj.name] = future.result()
+                    except Exception as e:
+                        logger.error(f"[ClusterState.annotate_hosts] Individual metrics query failed for "
+                                     f"host '{host_obj.name}': {e}")
+
         for host_obj in self.hosts:
             host_name_for_log = "UnknownHostObject" # Default
             try:
                 host_name_for_log = getattr(host_obj, 'name', 'UnknownHostObject_NoNameAttr')
-                logger.debug(f"[ClusterState.annotate_hosts] Processing host: {host_name_for_log}, Type: {type(host_obj)}")
+                logger.debug("[ClusterState.annotate_hosts] Processing host: %s, Type: %s", host_name_for_log, type(host_obj))
 
                 if not hasattr(host_obj, '_moId') or host_obj._moId is None:
                     logger.warning(f"[ClusterState.annotate_hosts] Host {host_name_for_log} has missing or None _moId. Skipping its metric annotation.")
                     continue
                 
-                # Original logic for a host
-                rm_host_metrics = resource_monitor.get_host_metrics(host_obj)
+                # Batch result, topped up by the concurrent fallback queries above
+                rm_host_metrics = batch_host_metrics.get(host_name_for_log, {})
+
+                host_props = host_props_by_moid.get(host_obj._moId)
+                if host_props is not None:
+                    host_memory_usage = host_props.get('summary.quickStats.overallMemoryUsage') or 0
+                    host_parent = host_props.get('parent')
+                else:
+                    host_memory_usage = host_obj.summary.quickStats.overallMemoryUsage \
+                        if host_obj.summary and host_obj.summary.quickStats else 0
+                    host_parent = getattr(host_obj, 'parent', None)
+
                 current_host_metrics = {
                     'cpu_usage': 0, # Summed from VMs for now
-                    'memory_usage': host_obj.summary.quickStats.overallMemoryUsage if host_obj.summary and host_obj.summary.quickStats else 0, # Directly use host's overall memory usage
+                    'memory_usage': host_memory_usage, # Directly use host's overall memory usage
                     'disk_io_usage': 0, # Summed from VMs
                     'network_io_usage': 0, # Summed from VMs
                     'cpu_capacity': rm_host_metrics.get('cpu_capacity', 0),
@@ -245,8 +709,8 @@ class ClusterState:
                 
                 # Get cluster name
                 try:
-                    if host_obj.parent and hasattr(host_obj.parent, 'name'):
-                        current_host_metrics['cluster_name'] = host_obj.parent.name
+                    if host_parent is not None and hasattr(host_parent, 'name'):
+                        current_host_metrics['cluster_name'] = host_parent.name
                     else:
                         logger.debug(f"Host {host_name_for_log} parent or parent.name not found. Defaulting cluster_name.")
                 except AttributeError as e:
@@ -254,14 +718,14 @@ class ClusterState:
                 except Exception as e: # Catch any other unexpected errors
                     logger.error(f"Unexpected error getting cluster name for host {host_name_for_log}: {e}. Defaulting cluster_name.")
 
-                for vm_on_host in self.get_vms_on_host(host_obj):
-                    vm_metrics_data = self.vm_metrics.get(vm_on_host.name, {})
-                    # ... (summation logic) ...
-                    current_host_metrics['cpu_usage'] += vm_metrics_data.get('cpu_usage_abs', 0)
-                    # The line for memory_usage summation is now removed.
-                    current_host_metrics['disk_io_usage'] += vm_metrics_data.get('disk_io_usage_abs', 0)
-                    current_host_metrics['network_io_usage'] += vm_metrics_data.get('network_io_usage_abs', 0)
-                    current_host_metrics['vms'].append(vm_on_host.name)
+                # Per-host sums were accumulated during VM annotation; one dict
+                # read replaces the per-host VM summation loop
+                rollup = self._host_vm_rollup.get(host_obj._moId)
+                if rollup is not None:
+                    current_host_metrics['cpu_usage'] = rollup[0]
+                    current_host_metrics['disk_io_usage'] = rollup[1]
+                    current_host_metrics['network_io_usage'] = rollup[2]
+                    current_host_metrics['vms'] = list(rollup[3])
 
                 current_host_metrics['cpu_usage_pct'] = (current_host_metrics['cpu_usage'] / current_host_metrics['cpu_capacity'] * 100) \
                     if current_host_metrics['cpu_capacity'] > 0 else 0
@@ -270,12 +734,19 @@ class ClusterState:
                 
                 self.host_metrics[host_obj.name] = current_host_metrics
                 
-                logger.debug(f"Host {host_obj.name} annotated metrics:")
-                logger.debug(f"  CPU: {current_host_metrics['cpu_usage_pct']:.1f}% ({current_host_metrics['cpu_usage']}/{current_host_metrics['cpu_capacity']} MHz)")
-                logger.debug(f"  Memory: {current_host_metrics['memory_usage_pct']:.1f}% ({current_host_metrics['memory_usage']}/{current_host_metrics['memory_capacity']} MB)")
-                logger.debug(f"  Disk I/O: {current_host_metrics['disk_io_usage']:.1f} MBps (Capacity: {current_host_metrics['disk_io_capacity']:.1f} MBps)")
-                logger.debug(f"  Network I/O: {current_host_metrics['network_io_usage']:.1f} MBps (Capacity: {current_host_metrics['network_capacity']:.1f} MBps)")
-                logger.debug(f"  VMs: {', '.join(current_host_metrics['vms'])}\n")
+                # Guard the multi-line block so the per-host formatting work is
+                # skipped entirely at INFO and above
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Host %s annotated metrics:", host_name_for_log)
+                    logger.debug("  CPU: %.1f%% (%s/%s MHz)", current_host_metrics['cpu_usage_pct'],
+                                 current_host_metrics['cpu_usage'], current_host_metrics['cpu_capacity'])
+                    logger.debug("  Memory: %.1f%% (%s/%s MB)", current_host_metrics['memory_usage_pct'],
+                                 current_host_metrics['memory_usage'], current_host_metrics['memory_capacity'])
+                    logger.debug("  Disk I/O: %.1f MBps (Capacity: %.1f MBps)", current_host_metrics['disk_io_usage'],
+                                 current_host_metrics['disk_io_capacity'])
+                    logger.debug("  Network I/O: %.1f MBps (Capacity: %.1f MBps)", current_host_metrics['network_io_usage'],
+                                 current_host_metrics['network_capacity'])
+                    logger.debug("  VMs: %s\n", ', '.join(current_host_metrics['vms']))
 
             except AttributeError as ae:
                 logger.error(f"[ClusterState.annotate_hosts] AttributeError while processing host '{host_name_for_log}' (Type: {type(host_obj)}): {ae}")
@@ -289,31 +760,24 @@ class ClusterState:
         """
         Return list of VMs currently running on the specified host.
         """
-        vms_on_host = []
         # Ensure host_object is valid and has _moId before proceeding
         if not hasattr(host_object, '_moId') or not host_object._moId:
             host_identifier = getattr(host_object, 'name', str(host_object))
             logger.warning(f"[ClusterState.get_vms_on_host] Provided host_object '{host_identifier}' is invalid or has no _moId. Cannot find VMs.")
-            return vms_on_host
+            return []
 
-        for vm_obj in self.vms:
-            host_of_vm = self.get_host_of_vm(vm_obj) # This returns a vim.HostSystem object or None
-            
-            # Ensure host_of_vm is valid and has _moId before comparison
-            if host_of_vm and hasattr(host_of_vm, '_moId') and host_of_vm._moId:
-                if host_of_vm._moId == host_object._moId:
-                    vms_on_host.append(vm_obj)
-            elif host_of_vm: # host_of_vm exists but lacks _moId or it's None
-                vm_identifier = getattr(vm_obj, 'name', str(vm_obj))
-                host_of_vm_identifier = getattr(host_of_vm, 'name', str(host_of_vm))
-                logger.warning(f"[ClusterState.get_vms_on_host] Host '{host_of_vm_identifier}' for VM '{vm_identifier}' is invalid or has no _moId. Skipping for host comparison.")
-                
-        return vms_on_host
+        # O(1) read from the precomputed host->VMs index; copied so callers
+        # cannot mutate the index
+        return list(self._vms_by_host_moid.get(host_object._moId, []))
         
     def get_vm_by_name(self, vm_name):
         """
         Return the VM object with the given name, or None if not found.
         """
+        vm_obj = self._vms_by_name.get(vm_name)
+        if vm_obj is not None:
+            return vm_obj
+        # Fallback scan for VMs that entered self.vms outside the indexed path
         for vm_obj in self.vms:
             if vm_obj.name == vm_name:
                 return vm_obj
@@ -327,7 +791,11 @@ class ClusterState:
         if not hasattr(self, 'hosts') or not self.hosts:
             logger.warning("[ClusterState.get_host_by_name] self.hosts is not initialized or is empty.")
             return None
-            
+
+        host_obj = self._hosts_by_name.get(host_name)
+        if host_obj is not None:
+            return host_obj
+        # Fallback scan for hosts that entered self.hosts outside the indexed path
         for host_obj in self.hosts:
             if hasattr(host_obj, 'name') and host_obj.name == host_name:
                 return host_obj
@@ -341,71 +809,113 @@ class ClusterState:
             logger.warning("Metrics not yet collected. Run update_metrics() first.")
             return
 
+        # Everything below is INFO-level output; skip all the row formatting
+        # when the level is suppressed
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
         total_cpu_capacity = 0
         total_mem_capacity = 0
         total_cpu_usage = 0
         total_mem_usage = 0
         total_disk_io = 0
         total_net_io = 0
-        
 
-        logger.info("\n--- Host Summary ---")
+        # Buffer the whole report and emit it as one record per section; the
+        # per-line logger.info calls were a measurable syscall/flush cost on
+        # large clusters.
+        lines = ["\n--- Host Summary ---"]
 
         header = f"{'Cluster Name':<30} {'Hostname':<25} {'CPU %':<10} {'Mem %':<10} {'Storage I/O (MBps)':<20} {'Net Throughput (MBps)':<25} {'VM Count':<10}"
-        logger.info(header)
-        logger.info("-" * len(header))
+        lines.append(header)
+        lines.append("-" * len(header))
 
+        # Single pass: emit the summary rows while accumulating totals and
+        # buffering the per-host distribution lines for the next section
+        distribution_lines = []
         for host_name, metrics in self.host_metrics.items():
             cluster_name_to_log = metrics.get('cluster_name', 'N/A')
-            logger.info(f"{cluster_name_to_log:<30} {host_name:<25} {metrics.get('cpu_usage_pct', 0):<10.1f} {metrics.get('memory_usage_pct', 0):<10.1f} {metrics.get('disk_io_usage', 0):<20.1f} {metrics.get('network_io_usage', 0):<25.1f} {len(metrics.get('vms', [])):<10}")
-        
-        # Host-level statistics (this section title will now follow the summary table)
-        logger.info("\n--- Host Resource Distribution ---")
-        for host_name, metrics in self.host_metrics.items():
+            lines.append(f"{cluster_name_to_log:<30} {host_name:<25} {metrics.get('cpu_usage_pct', 0):<10.1f} {metrics.get('memory_usage_pct', 0):<10.1f} {metrics.get('disk_io_usage', 0):<20.1f} {metrics.get('network_io_usage', 0):<25.1f} {len(metrics.get('vms', [])):<10}")
+
             total_cpu_capacity += metrics['cpu_capacity']
             total_mem_capacity += metrics['memory_capacity']
             total_cpu_usage += metrics['cpu_usage']
             total_mem_usage += metrics['memory_usage']
             total_disk_io += metrics['disk_io_usage']
             total_net_io += metrics['network_io_usage']
-            
-            logger.info(f"Host: {host_name}")
-            logger.info(f"├─ CPU: {metrics['cpu_usage_pct']:.1f}% ({metrics['cpu_usage']}/{metrics['cpu_capacity']} MHz)")
-            logger.info(f"├─ Memory: {metrics['memory_usage_pct']:.1f}% ({metrics['memory_usage']}/{metrics['memory_capacity']} MB)")
-            logger.info(f"├─ Disk I/O: {metrics['disk_io_usage']:.1f} MBps")
-            logger.info(f"├─ Network I/O: {metrics['network_io_usage']:.1f} MBps")
-            logger.info(f"└─ VMs: {len(metrics['vms'])} ({', '.join(metrics['vms'])})")
+
+            distribution_lines.append(f"Host: {host_name}")
+            distribution_lines.append(f"├─ CPU: {metrics['cpu_usage_pct']:.1f}% ({metrics['cpu_usage']}/{metrics['cpu_capacity']} MHz)")
+            distribution_lines.append(f"├─ Memory: {metrics['memory_usage_pct']:.1f}% ({metrics['memory_usage']}/{metrics['memory_capacity']} MB)")
+            distribution_lines.append(f"├─ Disk I/O: {metrics['disk_io_usage']:.1f} MBps")
+            distribution_lines.append(f"├─ Network I/O: {metrics['network_io_usage']:.1f} MBps")
+            distribution_lines.append(f"└─ VMs: {len(metrics['vms'])} ({', '.join(metrics['vms'])})")
+
+        # Host-level statistics (this section title will now follow the summary table)
+        lines.append("\n--- Host Resource Distribution ---")
+        lines.extend(distribution_lines)
 
         # VM distribution analysis
-        logger.info("\n--- VM Resource Consumption ---")
+        lines.append("\n--- VM Resource Consumption ---")
         for vm_name, metrics in self.vm_metrics.items():
             host_obj = self.get_host_of_vm(metrics['vm_obj'])
             host_display_name = host_obj.name if host_obj and hasattr(host_obj, 'name') else 'Unknown'
-            logger.info(f"VM: {vm_name} (on {host_display_name})")
-            logger.info(f"├─ CPU: {metrics.get('cpu_usage_abs', 0)} MHz")
-            logger.info(f"├─ Memory: {metrics.get('memory_usage_abs', 0)} MB")
-            logger.info(f"├─ Disk I/O: {metrics.get('disk_io_usage_abs', 0):.1f} MBps")
-            logger.info(f"└─ Network I/O: {metrics.get('network_io_usage_abs', 0):.1f} MBps")
+            lines.append(f"VM: {vm_name} (on {host_display_name})")
+            lines.append(f"├─ CPU: {metrics.get('cpu_usage_abs', 0)} MHz")
+            lines.append(f"├─ Memory: {metrics.get('memory_usage_abs', 0)} MB")
+            lines.append(f"├─ Disk I/O: {metrics.get('disk_io_usage_abs', 0):.1f} MBps")
+            lines.append(f"└─ Network I/O: {metrics.get('network_io_usage_abs', 0):.1f} MBps")
 
         # Overall cluster metrics
         cluster_cpu_usage = (total_cpu_usage / total_cpu_capacity * 100) if total_cpu_capacity > 0 else 0
         cluster_mem_usage = (total_mem_usage / total_mem_capacity * 100) if total_mem_capacity > 0 else 0
-        
-        logger.info("\n--- Cluster Total Resource Usage ---")
-        logger.info(f"CPU: {cluster_cpu_usage:.1f}% ({total_cpu_usage}/{total_cpu_capacity} MHz)")
-        logger.info(f"Memory: {cluster_mem_usage:.1f}% ({total_mem_usage}/{total_mem_capacity} MB)")
-        logger.info(f"Total Disk I/O: {total_disk_io:.1f} MBps")
-        logger.info(f"Total Network I/O: {total_net_io:.1f} MBps")
-        logger.info(f"Total Hosts: {len(self.hosts)}")
-        logger.info(f"Total VMs: {len(self.vms)}\n")
+
+        lines.append("\n--- Cluster Total Resource Usage ---")
+        lines.append(f"CPU: {cluster_cpu_usage:.1f}% ({total_cpu_usage}/{total_cpu_capacity} MHz)")
+        lines.append(f"Memory: {cluster_mem_usage:.1f}% ({total_mem_usage}/{total_mem_capacity} MB)")
+        lines.append(f"Total Disk I/O: {total_disk_io:.1f} MBps")
+        lines.append(f"Total Network I/O: {total_net_io:.1f} MBps")
+        lines.append(f"Total Hosts: {len(self.hosts)}")
+        lines.append(f"Total VMs: {len(self.vms)}\n")
+
+        logger.info("\n".join(lines))
 
     def update_metrics(self, resource_monitor=None):
         """Update VM and Host metrics"""
         if resource_monitor is None:
             from .resource_monitor import ResourceMonitor # Keep local import for safety
             logger.warning("ResourceMonitor not provided to update_metrics, creating a new instance. This is not recommended for production.")
-            resource_monitor = ResourceMonitor(self.service_instance) 
+            resource_monitor = ResourceMonitor(self.service_instance)
+
+        # Fetch VM and host usage metrics with one combined QueryPerf call;
+        # the annotate passes then consume the prebuilt maps without further
+        # PerfManager traffic.
+        vm_metrics_map = host_metrics_map = None
+        if hasattr(resource_monitor, 'get_metrics_bulk'):
+            try:
+                vm_metrics_map, host_metrics_map = resource_monitor.get_metrics_bulk(self.vms, self.hosts)
+            except Exception as e:
+                logger.warning(f"[ClusterState] Bulk metrics query failed: {e}. Falling back to per-class batch queries.")
+                vm_metrics_map = host_metrics_map = None
+
+        # Host annotation needs the VM rollup, so the two passes stay ordered;
+        # but the host quickStats/parent property fetch has no such dependency
+        # and can overlap the VM annotation pass.
+        host_props_by_moid = None
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            host_props_future = pool.submit(
+                self._retrieve_object_properties,
+                self.hosts, vim.HostSystem,
+                ['summary.quickStats.overallMemoryUsage', 'parent'])
 
-        self.annotate_vms_with_metrics(resource_monitor)
-        self.annotate_hosts_with_metrics(resource_monitor)
-        self.log_cluster_stats() 
+            self.annotate_vms_with_metrics(resource_monitor, batch_io_metrics=vm_metrics_map)
+
+            try:
+                host_props_by_moid = host_props_future.result()
+            except Exception as e:
+                logger.warning(f"[ClusterState] Prefetch of host quickStats failed: {e}. Falling back to per-host reads.")
+                host_props_by_moid = {}
+
+        self.annotate_hosts_with_metrics(resource_monitor, batch_host_metrics=host_metrics_map,
+                                         batch_host_props=host_props_by_moid)
+        self.log_cluster_stats()
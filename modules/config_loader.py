@@ -1,10 +1,21 @@
 import yaml
+import copy
 import logging
 import os
+import pickle
 from typing import Any, Dict, Optional
 
 logger = logging.getLogger('fdrs')
 
+# Location of the parsed-config cache, validated against the YAML's path and mtime
+CONFIG_CACHE_PATH = os.path.expanduser('~/.cache/fdrs/config.pkl')
+
+# Prefer the C-backed YAML loader when libyaml is available
+try:
+    _YamlLoader = yaml.CSafeLoader
+except AttributeError:
+    _YamlLoader = yaml.SafeLoader
+
 
 class ConfigLoader:
     """
@@ -34,6 +45,7 @@ class ConfigLoader:
         'migration': {
             'default_max_migrations': 20,
             'migration_timeout_seconds': 300,
+            'max_concurrent_migrations': 4,
             'host_cpu_high_watermark_percent': 90,
             'host_memory_high_watermark_percent': 90
         },
@@ -47,17 +59,40 @@ class ConfigLoader:
         }
     }
 
-    __slots__ = ('config_file', 'config')
+    __slots__ = ('config_file', 'config', '_resolved')
 
     def __init__(self, config_file: str = 'config/fdrs_config.yaml'):
         """
         Initialize config loader and load configuration.
-        
+
         Args:
             config_file: Path to YAML config file (relative or absolute)
         """
         self.config_file = config_file
         self.config = self._load_config()
+        self._resolved = self._resolve_known_keys()
+
+    def _resolve_known_keys(self) -> Dict[str, Any]:
+        """
+        Resolve every published accessor's key path once at load time so the
+        get_* methods become a flat dict read instead of re-walking the nested
+        config (with its miss-logging) on every call from planning loops.
+        """
+        return {
+            'storage_disk_io_capacity': self.get('storage', 'disk_io_capacity_mbps', default=self.DEFAULTS['storage']['disk_io_capacity_mbps']),
+            'network_bandwidth': self.get('network', 'bandwidth_mbps', default=self.DEFAULTS['network']['bandwidth_mbps']),
+            'migration_timeout': self.get('migration', 'migration_timeout_seconds', default=self.DEFAULTS['migration']['migration_timeout_seconds']),
+            'max_migrations': self.get('migration', 'default_max_migrations', default=self.DEFAULTS['migration']['default_max_migrations']),
+            'max_concurrent_migrations': self.get('migration', 'max_concurrent_migrations', default=self.DEFAULTS['migration']['max_concurrent_migrations']),
+            'host_cpu_watermark': self.get('migration', 'host_cpu_high_watermark_percent', default=self.DEFAULTS['migration']['host_cpu_high_watermark_percent']),
+            'host_memory_watermark': self.get('migration', 'host_memory_high_watermark_percent', default=self.DEFAULTS['migration']['host_memory_high_watermark_percent']),
+            'percentage_cache_enabled': self.get('optimization', 'enable_percentage_cache', default=self.DEFAULTS['optimization']['enable_percentage_cache']),
+            'prefix_cache_enabled': self.get('optimization', 'enable_prefix_cache', default=self.DEFAULTS['optimization']['enable_prefix_cache']),
+            'anti_affinity_mode': self.get('anti_affinity', 'mode', default=self.DEFAULTS['anti_affinity']['mode']),
+            'anti_affinity_regex_pattern': self.get('anti_affinity', 'regex_pattern', default=self.DEFAULTS['anti_affinity']['regex_pattern']),
+            'anti_affinity_min_name_length': self.get('anti_affinity', 'min_name_length', default=self.DEFAULTS['anti_affinity']['min_name_length']),
+            'anti_affinity_min_group_size': self.get('anti_affinity', 'min_group_size', default=self.DEFAULTS['anti_affinity']['min_group_size']),
+        }
 
     def _load_config(self):
         """
@@ -65,38 +100,84 @@ class ConfigLoader:
         """
         if not os.path.exists(self.config_file):
             logger.warning(f"[ConfigLoader] Config file not found at '{self.config_file}'. Using default values.")
-            return self.DEFAULTS.copy()
-        
+            return copy.deepcopy(self.DEFAULTS)
+
         try:
+            config_path = os.path.abspath(self.config_file)
+            mtime_ns = os.stat(self.config_file).st_mtime_ns
+
+            # Reuse the pickled parse result from a previous run if the YAML is unchanged
+            cached_config = self._load_cached_config(config_path, mtime_ns)
+            if cached_config is not None:
+                logger.info(f"[ConfigLoader] Configuration loaded from parse cache (config unchanged).")
+                return cached_config
+
             with open(self.config_file, 'r') as f:
-                file_config = yaml.safe_load(f) or {}
-            
+                file_config = yaml.load(f, Loader=_YamlLoader) or {}
+
             # Merge loaded config with defaults (defaults are overridden by file values)
-            merged_config = self._deep_merge(self.DEFAULTS.copy(), file_config)
-            
+            merged_config = self._deep_merge(copy.deepcopy(self.DEFAULTS), file_config)
+
+            self._write_cached_config(config_path, mtime_ns, merged_config)
             logger.info(f"[ConfigLoader] Configuration loaded from '{self.config_file}'.")
             return merged_config
-        
+
         except yaml.YAMLError as e:
             logger.error(f"[ConfigLoader] Error parsing YAML config file: {e}. Using default values.")
-            return self.DEFAULTS.copy()
+            return copy.deepcopy(self.DEFAULTS)
         except Exception as e:
             logger.error(f"[ConfigLoader] Error loading config file: {e}. Using default values.")
-            return self.DEFAULTS.copy()
+            return copy.deepcopy(self.DEFAULTS)
+
+    @staticmethod
+    def _load_cached_config(config_path: str, mtime_ns: int) -> Optional[Dict]:
+        """
+        Return the cached parsed config if it matches both the YAML's absolute
+        path and its mtime, else None. Keying on the path as well prevents a
+        cache written for one checkout's config from being served for another
+        file that happens to share the same mtime.
+        """
+        try:
+            with open(CONFIG_CACHE_PATH, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('path') == config_path and cached.get('mtime_ns') == mtime_ns:
+                return cached.get('data')
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug(f"[ConfigLoader] Could not read config parse cache: {e}")
+        return None
+
+    @staticmethod
+    def _write_cached_config(config_path: str, mtime_ns: int, data: Dict) -> None:
+        """Atomically persist the parsed config keyed by the YAML's path and mtime."""
+        try:
+            os.makedirs(os.path.dirname(CONFIG_CACHE_PATH), mode=0o700, exist_ok=True)
+            tmp_path = CONFIG_CACHE_PATH + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'path': config_path, 'mtime_ns': mtime_ns, 'data': data}, f)
+            os.replace(tmp_path, CONFIG_CACHE_PATH)
+        except Exception as e:
+            logger.debug(f"[ConfigLoader] Could not write config parse cache: {e}")
 
     @staticmethod
     def _deep_merge(defaults, overrides):
         """
         Deep merge overrides into defaults (overrides take precedence).
+        Iterative with an explicit stack; callers pass an owned (deep-copied)
+        defaults dict, which is merged into in place and returned.
         """
-        result = defaults.copy()
-        
-        for key, value in overrides.items():
-            if isinstance(value, dict) and key in result and isinstance(result[key], dict):
-                result[key] = ConfigLoader._deep_merge(result[key], value)
-            else:
-                result[key] = value
-        
+        result = defaults
+        stack = [(result, overrides)]
+
+        while stack:
+            target, source = stack.pop()
+            for key, value in source.items():
+                if isinstance(value, dict) and isinstance(target.get(key), dict):
+                    stack.append((target[key], value))
+                else:
+                    target[key] = value
+
         return result
 
     def get(self, *keys, default=None):
@@ -124,52 +205,56 @@ class ConfigLoader:
 
     def get_storage_disk_io_capacity(self):
         """Get disk I/O capacity in MBps."""
-        return self.get('storage', 'disk_io_capacity_mbps', default=self.DEFAULTS['storage']['disk_io_capacity_mbps'])
+        return self._resolved['storage_disk_io_capacity']
 
     def get_network_bandwidth(self):
         """Get network bandwidth in MBps."""
-        return self.get('network', 'bandwidth_mbps', default=self.DEFAULTS['network']['bandwidth_mbps'])
+        return self._resolved['network_bandwidth']
 
     def get_migration_timeout(self):
         """Get migration timeout in seconds."""
-        return self.get('migration', 'migration_timeout_seconds', default=self.DEFAULTS['migration']['migration_timeout_seconds'])
+        return self._resolved['migration_timeout']
 
     def get_max_migrations(self):
         """Get default max migrations."""
-        return self.get('migration', 'default_max_migrations', default=self.DEFAULTS['migration']['default_max_migrations'])
+        return self._resolved['max_migrations']
+
+    def get_max_concurrent_migrations(self):
+        """Get maximum number of concurrently running migrations."""
+        return self._resolved['max_concurrent_migrations']
 
     def get_host_cpu_watermark(self):
         """Get CPU high watermark percentage."""
-        return self.get('migration', 'host_cpu_high_watermark_percent', default=self.DEFAULTS['migration']['host_cpu_high_watermark_percent'])
+        return self._resolved['host_cpu_watermark']
 
     def get_host_memory_watermark(self):
         """Get memory high watermark percentage."""
-        return self.get('migration', 'host_memory_high_watermark_percent', default=self.DEFAULTS['migration']['host_memory_high_watermark_percent'])
+        return self._resolved['host_memory_watermark']
 
     def is_percentage_cache_enabled(self):
         """Check if percentage caching is enabled."""
-        return self.get('optimization', 'enable_percentage_cache', default=self.DEFAULTS['optimization']['enable_percentage_cache'])
+        return self._resolved['percentage_cache_enabled']
 
     def is_prefix_cache_enabled(self):
         """Check if prefix caching is enabled."""
-        return self.get('optimization', 'enable_prefix_cache', default=self.DEFAULTS['optimization']['enable_prefix_cache'])
+        return self._resolved['prefix_cache_enabled']
 
     # Anti-Affinity Configuration Methods
     def get_anti_affinity_mode(self) -> str:
         """Get anti-affinity prefix extraction mode ('strip_digits' or 'regex')."""
-        return self.get('anti_affinity', 'mode', default=self.DEFAULTS['anti_affinity']['mode'])
+        return self._resolved['anti_affinity_mode']
 
     def get_anti_affinity_regex_pattern(self) -> str:
         """Get custom regex pattern for prefix extraction."""
-        return self.get('anti_affinity', 'regex_pattern', default=self.DEFAULTS['anti_affinity']['regex_pattern'])
+        return self._resolved['anti_affinity_regex_pattern']
 
     def get_anti_affinity_min_name_length(self) -> int:
         """Get minimum VM name length for anti-affinity grouping."""
-        return self.get('anti_affinity', 'min_name_length', default=self.DEFAULTS['anti_affinity']['min_name_length'])
+        return self._resolved['anti_affinity_min_name_length']
 
     def get_anti_affinity_min_group_size(self) -> int:
         """Get minimum group size to enforce anti-affinity rules."""
-        return self.get('anti_affinity', 'min_group_size', default=self.DEFAULTS['anti_affinity']['min_group_size'])
+        return self._resolved['anti_affinity_min_group_size']
 
     def log_config(self):
         """Log loaded configuration for debugging."""
@@ -183,6 +268,7 @@ class ConfigLoader:
         logger.info(f"  Network Bandwidth: {self.get_network_bandwidth()} MBps")
         logger.info(f"  Migration Timeout: {self.get_migration_timeout()}s")
         logger.info(f"  Default Max Migrations: {self.get_max_migrations()}")
+        logger.info(f"  Max Concurrent Migrations: {self.get_max_concurrent_migrations()}")
         logger.info(f"  CPU High Watermark: {self.get_host_cpu_watermark()}%")
         logger.info(f"  Memory High Watermark: {self.get_host_memory_watermark()}%")
         logger.info(f"  Percentage Cache Enabled: {self.is_percentage_cache_enabled()}")
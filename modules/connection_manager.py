@@ -1,5 +1,6 @@
 from pyVim import connect
-from pyVmomi import vim
+from pyVmomi import vim, SoapStubAdapter
+import os
 import ssl
 import logging
 import threading
@@ -11,24 +12,31 @@ logger = logging.getLogger('fdrs')
 # Session keep-alive interval (seconds)
 DEFAULT_KEEPALIVE_INTERVAL = 300  # 5 minutes
 
+# Directory for cached session cookies (one file per vCenter)
+SESSION_CACHE_DIR = os.path.expanduser('~/.cache/fdrs')
+
 
 class ConnectionManager:
     """
     Handles connection and disconnection to vCenter Server.
-    
+
     Features:
     - Session keep-alive to prevent timeout during long operations
+    - Session cookie caching on disk so repeated runs skip the full
+      SSL handshake + SOAP login round trips
     - Proper cleanup on disconnect
-    
+
     Note: Uses unverified SSL context for lab/dev environments.
     For production, configure proper SSL certificate validation.
     """
-    
-    __slots__ = ('vcenter_ip', 'username', 'password', 'service_instance', 
-                 '_keepalive_thread', '_keepalive_stop', '_keepalive_interval')
 
-    def __init__(self, vcenter_ip: str, username: str, password: str, 
-                 keepalive_interval: int = DEFAULT_KEEPALIVE_INTERVAL):
+    __slots__ = ('vcenter_ip', 'username', 'password', 'service_instance',
+                 '_keepalive_thread', '_keepalive_stop', '_keepalive_interval',
+                 '_use_session_cache')
+
+    def __init__(self, vcenter_ip: str, username: str, password: str,
+                 keepalive_interval: int = DEFAULT_KEEPALIVE_INTERVAL,
+                 use_session_cache: bool = True):
         self.vcenter_ip = vcenter_ip
         self.username = username
         self.password = password
@@ -36,14 +44,82 @@ class ConnectionManager:
         self._keepalive_thread: Optional[threading.Thread] = None
         self._keepalive_stop = threading.Event()
         self._keepalive_interval = keepalive_interval
+        self._use_session_cache = use_session_cache
+
+    @property
+    def _cookie_cache_path(self) -> str:
+        """Path of the cached session cookie file for this vCenter."""
+        return os.path.join(SESSION_CACHE_DIR, f"session-{self.vcenter_ip}.bin")
+
+    def _load_cached_cookie(self) -> Optional[str]:
+        """Read a previously saved session cookie, if any."""
+        try:
+            with open(self._cookie_cache_path, 'r') as f:
+                cookie = f.read().strip()
+            return cookie or None
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"[ConnectionManager] Could not read cached session cookie: {e}")
+            return None
+
+    def _save_session_cookie(self) -> None:
+        """Persist the current session cookie (mode 0600) for reuse by the next run."""
+        try:
+            cookie = getattr(self.service_instance, '_stub', None) and self.service_instance._stub.cookie
+            if not cookie:
+                return
+            os.makedirs(SESSION_CACHE_DIR, mode=0o700, exist_ok=True)
+            cache_path = self._cookie_cache_path
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(cookie)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, cache_path)
+            logger.debug(f"[ConnectionManager] Session cookie cached at {cache_path}")
+        except Exception as e:
+            logger.debug(f"[ConnectionManager] Could not cache session cookie: {e}")
+
+    def _connect_with_cached_cookie(self, context) -> Optional[vim.ServiceInstance]:
+        """
+        Try to resume a previous session from the cached cookie.
+        Returns a validated ServiceInstance, or None if the cookie is
+        missing/expired (caller falls back to password login).
+        """
+        cookie = self._load_cached_cookie()
+        if not cookie:
+            return None
+
+        try:
+            stub = SoapStubAdapter(
+                host=self.vcenter_ip,
+                port=443,
+                path='/sdk',
+                version='vim.version.version6',
+                sslContext=context
+            )
+            stub.cookie = cookie
+            service_instance = vim.ServiceInstance("ServiceInstance", stub)
+            # Cheap validation call: current session is None when not authenticated
+            if service_instance.content.sessionManager.currentSession is None:
+                logger.debug("[ConnectionManager] Cached session cookie is no longer valid.")
+                return None
+            logger.info("[ConnectionManager] Reused cached vCenter session (login skipped).")
+            return service_instance
+        except Exception as e:
+            logger.debug(f"[ConnectionManager] Cached session resume failed: {e}")
+            return None
 
     def connect(self) -> vim.ServiceInstance:
         """
         Establishes a connection to vCenter and starts session keep-alive.
-        
+
+        Tries to resume a cached session first (skipping the SOAP login),
+        falling back to a regular credentialed SmartConnect.
+
         Returns:
             vim.ServiceInstance: Connected vCenter service instance
-        
+
         Raises:
             Exception: If connection fails
         """
@@ -53,23 +129,30 @@ class ConnectionManager:
             # Create an unverified SSL context (ignore SSL certs)
             context = ssl._create_unverified_context()
 
-            self.service_instance = connect.SmartConnect(
-                host=self.vcenter_ip,
-                user=self.username,
-                pwd=self.password,
-                port=443,
-                sslContext=context
-            )
+            if self._use_session_cache:
+                self.service_instance = self._connect_with_cached_cookie(context)
 
             if not self.service_instance:
-                logger.error("[ConnectionManager] Failed to connect to vCenter!")
-                raise Exception("Service instance is None")
+                self.service_instance = connect.SmartConnect(
+                    host=self.vcenter_ip,
+                    user=self.username,
+                    pwd=self.password,
+                    port=443,
+                    sslContext=context
+                )
+
+                if not self.service_instance:
+                    logger.error("[ConnectionManager] Failed to connect to vCenter!")
+                    raise Exception("Service instance is None")
+
+                if self._use_session_cache:
+                    self._save_session_cookie()
 
             logger.info("[ConnectionManager] Successfully connected to vCenter!")
-            
+
             # Start keep-alive thread
             self._start_keepalive()
-            
+
             return self.service_instance
 
         except Exception as e:
@@ -121,17 +204,26 @@ class ConnectionManager:
     def disconnect(self) -> None:
         """
         Stops keep-alive and disconnects from vCenter.
+
+        When session caching is enabled the session is NOT logged out — the
+        socket is simply dropped so the cached cookie stays valid for the
+        next invocation.
         """
         # Stop keep-alive thread first
         if self._keepalive_thread and self._keepalive_thread.is_alive():
             self._keepalive_stop.set()
             self._keepalive_thread.join(timeout=2)
             logger.debug("[ConnectionManager] Session keep-alive stopped")
-        
+
         try:
             if self.service_instance:
-                connect.Disconnect(self.service_instance)
-                self.service_instance = None
-                logger.info("[ConnectionManager] Disconnected from vCenter cleanly.")
+                if self._use_session_cache:
+                    # Keep the vCenter session alive for cookie reuse; just drop our reference.
+                    self.service_instance = None
+                    logger.info("[ConnectionManager] Connection closed (session kept alive for reuse).")
+                else:
+                    connect.Disconnect(self.service_instance)
+                    self.service_instance = None
+                    logger.info("[ConnectionManager] Disconnected from vCenter cleanly.")
         except Exception as e:
             logger.error(f"[ConnectionManager] Error during disconnection: {e}")
@@ -13,14 +13,41 @@ AGGRESSIVENESS_THRESHOLDS = {
 }
 DEFAULT_THRESHOLD = 15.0
 
+# Prebuilt per-aggressiveness threshold dicts; get_thresholds hands these out
+# on every imbalance evaluation, so treat them as read-only.
+_THRESHOLD_DICTS = {
+    level: dict.fromkeys(('cpu', 'memory', 'disk', 'network'), value)
+    for level, value in AGGRESSIVENESS_THRESHOLDS.items()
+}
+_DEFAULT_THRESHOLD_DICT = dict.fromkeys(('cpu', 'memory', 'disk', 'network'), DEFAULT_THRESHOLD)
+
+# Bit per balanceable resource; membership tests on the hot path become a
+# single integer AND instead of list scans.
+METRIC_BITS = {'cpu': 1, 'memory': 2, 'disk': 4, 'network': 8}
+ALL_METRICS_MASK = 0b1111
+
+
+def build_metrics_mask(metric_names) -> int:
+    """Convert an iterable of metric names into an integer bitmask."""
+    mask = 0
+    for name in metric_names:
+        bit = METRIC_BITS.get(name)
+        if bit:
+            mask |= bit
+        else:
+            logger.warning(f"[LoadEvaluator] Unknown metric name '{name}' ignored in metrics mask.")
+    return mask
+
 class LoadEvaluator:
     """Evaluates load balance across cluster hosts."""
     
-    __slots__ = ('hosts', '_cache_percentage_lists', 'cluster_totals', 'target_per_host', 'resource_deviations')
-    
-    def __init__(self, hosts: List[Dict[str, Any]]):
+    __slots__ = ('hosts', '_cache_percentage_lists', '_imbalance_cache',
+                 'cluster_totals', 'target_per_host', 'resource_deviations')
+
+    def __init__(self, hosts: List[Any]):
         self.hosts = hosts
         self._cache_percentage_lists: Optional[Tuple] = None
+        self._imbalance_cache: Dict[Tuple[int, int], Dict] = {}
         self.cluster_totals: Dict[str, float] = {}
         self.target_per_host: Dict[str, float] = {}
         self.resource_deviations: Dict[str, List[float]] = {}
@@ -29,69 +56,67 @@ class LoadEvaluator:
         if self._cache_percentage_lists is not None:
             return self._cache_percentage_lists
             
-        cpu_percentages = []
-        mem_percentages = []
-        disk_percentages = []
-        net_percentages = []
-
         if not isinstance(self.hosts, list) or not self.hosts:
             logger.warning(f"[LoadEvaluator] Hosts list is not a list or is empty (type: {type(self.hosts)}). Cannot calculate percentage lists.")
             self._cache_percentage_lists = ([], [], [], [])
             return self._cache_percentage_lists
 
+        # Build one row of the four percentages per host, then transpose into
+        # columns with zip (a single C-level pass) instead of appending to
+        # four lists inside the loop
+        rows = []
         for host_data in self.hosts:
-            if not isinstance(host_data, dict):
-                logger.warning(f"[LoadEvaluator] Expected a dict for host_data, got {type(host_data)}. Skipping this host.")
-                cpu_percentages.append(0.0)
-                mem_percentages.append(0.0)
-                disk_percentages.append(0.0)
-                net_percentages.append(0.0)
+            if host_data is None:
+                logger.warning("[LoadEvaluator] Got None for host_data. Skipping this host.")
+                rows.append((0.0, 0.0, 0.0, 0.0))
                 continue
 
-            cpu_usage = host_data.get('cpu_usage', 0.0)
-            cpu_capacity = host_data.get('cpu_capacity', 0.0)
-            cpu_perc = (cpu_usage / cpu_capacity * 100.0) if cpu_capacity > 0 else 0.0
-            cpu_percentages.append(cpu_perc)
-
-            mem_usage = host_data.get('memory_usage', 0.0)
-            mem_capacity = host_data.get('memory_capacity', 0.0)
-            mem_perc = (mem_usage / mem_capacity * 100.0) if mem_capacity > 0 else 0.0
-            mem_percentages.append(mem_perc)
-
-            disk_usage = host_data.get('disk_io_usage', 0.0) 
-            disk_capacity = host_data.get('disk_io_capacity', 0.0) 
-            disk_perc = (disk_usage / disk_capacity * 100.0) if disk_capacity > 0 else 0.0
-            disk_percentages.append(disk_perc)
-
-            net_usage = host_data.get('network_io_usage', 0.0)
-            net_capacity = host_data.get('network_capacity', 0.0)
-            net_perc = (net_usage / net_capacity * 100.0) if net_capacity > 0 else 0.0
-            net_percentages.append(net_perc)
-        
+            cpu_usage = getattr(host_data, 'cpu_usage', 0.0)
+            cpu_capacity = getattr(host_data, 'cpu_capacity', 0.0)
+            mem_usage = getattr(host_data, 'memory_usage', 0.0)
+            mem_capacity = getattr(host_data, 'memory_capacity', 0.0)
+            disk_usage = getattr(host_data, 'disk_io_usage', 0.0)
+            disk_capacity = getattr(host_data, 'disk_io_capacity', 0.0)
+            net_usage = getattr(host_data, 'network_io_usage', 0.0)
+            net_capacity = getattr(host_data, 'network_capacity', 0.0)
+
+            rows.append((
+                (cpu_usage / cpu_capacity * 100.0) if cpu_capacity > 0 else 0.0,
+                (mem_usage / mem_capacity * 100.0) if mem_capacity > 0 else 0.0,
+                (disk_usage / disk_capacity * 100.0) if disk_capacity > 0 else 0.0,
+                (net_usage / net_capacity * 100.0) if net_capacity > 0 else 0.0,
+            ))
+
+        cpu_percentages, mem_percentages, disk_percentages, net_percentages = \
+            (list(column) for column in zip(*rows))
+
         self._cache_percentage_lists = (cpu_percentages, mem_percentages, disk_percentages, net_percentages)
         return self._cache_percentage_lists
 
     def get_thresholds(self, aggressiveness: int = 3) -> Dict[str, float]:
-        """Get threshold values based on aggressiveness level."""
-        threshold_value = AGGRESSIVENESS_THRESHOLDS.get(aggressiveness, DEFAULT_THRESHOLD)
-        
-        if aggressiveness not in AGGRESSIVENESS_THRESHOLDS:
-            logger.warning(f"[LoadEvaluator] Invalid aggressiveness level: {aggressiveness}. Using default: {threshold_value}%")
+        """Get threshold values based on aggressiveness level.
 
-        # All resources use the same threshold
-        thresholds = dict.fromkeys(['cpu', 'memory', 'disk', 'network'], threshold_value)
-        logger.debug(f"[LoadEvaluator] Aggressiveness: {aggressiveness}, Thresholds: {threshold_value}%")
+        Returns a shared prebuilt dict; callers must not mutate it.
+        """
+        thresholds = _THRESHOLD_DICTS.get(aggressiveness)
+        if thresholds is None:
+            logger.warning(f"[LoadEvaluator] Invalid aggressiveness level: {aggressiveness}. Using default: {DEFAULT_THRESHOLD}%")
+            thresholds = _DEFAULT_THRESHOLD_DICT
+
+        logger.debug(f"[LoadEvaluator] Aggressiveness: {aggressiveness}, Thresholds: {thresholds['cpu']}%")
         return thresholds
 
     def evaluate_imbalance(self, metrics_to_check=None, aggressiveness=3,
                        cpu_percentages_override=None,
                        mem_percentages_override=None,
                        disk_percentages_override=None,
-                       net_percentages_override=None):
-        if cpu_percentages_override is not None and \
+                       net_percentages_override=None,
+                       metrics_mask=None):
+        using_overrides = cpu_percentages_override is not None and \
            mem_percentages_override is not None and \
            disk_percentages_override is not None and \
-           net_percentages_override is not None:
+           net_percentages_override is not None
+        if using_overrides:
             logger.debug("[LoadEvaluator] Using overridden resource percentage lists for imbalance evaluation.")
             cpu_percentages = cpu_percentages_override
             mem_percentages = mem_percentages_override
@@ -108,106 +133,211 @@ class LoadEvaluator:
             'network': net_percentages
         }
 
-        if metrics_to_check is None:
-            metrics_to_check = ['cpu', 'memory', 'disk', 'network']
+        # Resolve the metric selection to a bitmask (single AND per resource below)
+        if metrics_mask is None:
+            if metrics_to_check is None:
+                metrics_mask = ALL_METRICS_MASK
+            else:
+                metrics_mask = build_metrics_mask(metrics_to_check)
 
-        allowed_thresholds = self.get_thresholds(aggressiveness) 
+        # The internal percentage lists are fixed for this evaluator's
+        # lifetime (one per planning cycle), so non-override evaluations can
+        # be served from a small memo. Simulation calls pass overrides that
+        # change every time and are never cached. Cached results are shared;
+        # callers only read them.
+        cache_key = None
+        if not using_overrides:
+            cache_key = (aggressiveness, metrics_mask)
+            cached_results = self._imbalance_cache.get(cache_key)
+            if cached_results is not None:
+                return cached_results
+
+        allowed_thresholds = self.get_thresholds(aggressiveness)
         imbalance_results = {}
 
-        for resource_name in metrics_to_check:
+        # Degenerate resources get their early-out entries here; the rest are
+        # collected so one fused traversal below covers all of them
+        fused_names = []
+        for resource_name, metric_bit in METRIC_BITS.items():
+            if not metrics_mask & metric_bit:
+                continue
             percentages = all_metrics_data.get(resource_name, []) # Default to empty list
             resource_threshold = allowed_thresholds.get(resource_name) # Get threshold for the resource
-            
-            if resource_threshold is None: 
+
+            if resource_threshold is None:
                 logger.error(f"[LoadEvaluator] Critical: No threshold defined for resource: {resource_name}. Skipping this resource.")
                 imbalance_results[resource_name] = {
-                    'is_imbalanced': False, 'current_diff': 0, 'threshold': 0, 
+                    'is_imbalanced': False, 'current_diff': 0, 'threshold': 0,
                     'min_usage': 0, 'max_usage': 0, 'avg_usage': 0, 'all_percentages': []
                 }
-                continue 
+                continue
 
             if not percentages or len(percentages) < 2:
                 logger.debug(f"[LoadEvaluator] Not enough data points for resource '{resource_name}' (count: {len(percentages)}), considered balanced.")
                 imbalance_results[resource_name] = {
-                    'is_imbalanced': False, 'current_diff': 0, 'threshold': resource_threshold, 
+                    'is_imbalanced': False, 'current_diff': 0, 'threshold': resource_threshold,
                     'min_usage': 0, 'max_usage': 0, 'avg_usage': 0, 'all_percentages': percentages
                 }
                 continue
 
-            current_min_usage = min(percentages)
-            current_max_usage = max(percentages)
-            current_avg_usage = sum(percentages) / len(percentages) # len will not be 0 here
-            current_diff = current_max_usage - current_min_usage
-            
-            is_res_imbalanced = False
-            if current_diff > resource_threshold:
-                logger.warning(f"[LoadEvaluator] Resource '{resource_name}' is imbalanced. Difference {current_diff:.2f}% > Threshold {resource_threshold:.2f}% (Aggressiveness: {aggressiveness})")
-                is_res_imbalanced = True
+            fused_names.append(resource_name)
+
+        if fused_names:
+            # min/max/sum for every selected resource in a single zipped pass
+            # over the host rows, instead of one traversal per resource. All
+            # lists share the host axis, so one fused pass covers them; fall
+            # back to per-resource passes if overrides disagree on length.
+            lengths = {len(all_metrics_data[name]) for name in fused_names}
+            mins = [all_metrics_data[name][0] for name in fused_names]
+            maxs = list(mins)
+            totals = [0.0] * len(fused_names)
+
+            if len(lengths) == 1:
+                for row in zip(*(all_metrics_data[name] for name in fused_names)):
+                    for i, usage in enumerate(row):
+                        if usage < mins[i]:
+                            mins[i] = usage
+                        elif usage > maxs[i]:
+                            maxs[i] = usage
+                        totals[i] += usage
             else:
-                logger.debug(f"[LoadEvaluator] Resource '{resource_name}' is balanced. Difference {current_diff:.2f}% <= Threshold {resource_threshold:.2f}% (Aggressiveness: {aggressiveness})")
-
-            imbalance_results[resource_name] = {
-                'is_imbalanced': is_res_imbalanced,
-                'current_diff': round(current_diff, 2),
-                'threshold': resource_threshold,
-                'min_usage': round(current_min_usage, 2),
-                'max_usage': round(current_max_usage, 2),
-                'avg_usage': round(current_avg_usage, 2),
-                'all_percentages': [round(p, 2) for p in percentages]
-            }
+                logger.debug("[LoadEvaluator] Percentage lists differ in length; computing stats per resource.")
+                for i, name in enumerate(fused_names):
+                    for usage in all_metrics_data[name]:
+                        if usage < mins[i]:
+                            mins[i] = usage
+                        elif usage > maxs[i]:
+                            maxs[i] = usage
+                        totals[i] += usage
+
+            for i, resource_name in enumerate(fused_names):
+                percentages = all_metrics_data[resource_name]
+                resource_threshold = allowed_thresholds[resource_name]
+                current_avg_usage = totals[i] / len(percentages) # len will not be 0 here
+                current_diff = maxs[i] - mins[i]
+
+                is_res_imbalanced = False
+                if current_diff > resource_threshold:
+                    logger.warning(f"[LoadEvaluator] Resource '{resource_name}' is imbalanced. Difference {current_diff:.2f}% > Threshold {resource_threshold:.2f}% (Aggressiveness: {aggressiveness})")
+                    is_res_imbalanced = True
+                else:
+                    logger.debug(f"[LoadEvaluator] Resource '{resource_name}' is balanced. Difference {current_diff:.2f}% <= Threshold {resource_threshold:.2f}% (Aggressiveness: {aggressiveness})")
+
+                imbalance_results[resource_name] = {
+                    'is_imbalanced': is_res_imbalanced,
+                    'current_diff': round(current_diff, 2),
+                    'threshold': resource_threshold,
+                    'min_usage': round(mins[i], 2),
+                    'max_usage': round(maxs[i], 2),
+                    'avg_usage': round(current_avg_usage, 2),
+                    'all_percentages': [round(p, 2) for p in percentages]
+                }
+
+        if cache_key is not None:
+            self._imbalance_cache[cache_key] = imbalance_results
         return imbalance_results
 
     def is_balanced(self, metrics=None, aggressiveness=3,
                     cpu_percentages_override=None,
                     mem_percentages_override=None,
                     disk_percentages_override=None,
-                    net_percentages_override=None):
-        # Pass through the overrides to evaluate_imbalance
-        imbalance_details = self.evaluate_imbalance(
-            metrics_to_check=metrics,
-            aggressiveness=aggressiveness,
-            cpu_percentages_override=cpu_percentages_override,
-            mem_percentages_override=mem_percentages_override,
-            disk_percentages_override=disk_percentages_override,
-            net_percentages_override=net_percentages_override
-        )
-        if not imbalance_details:
-            return True
-        for resource_name, details in imbalance_details.items():
-            if details.get('is_imbalanced', False): 
+                    net_percentages_override=None,
+                    metrics_mask=None):
+        # Boolean fast path: only the max-min spread per selected resource is
+        # needed, so skip evaluate_imbalance's result dicts and rounding
+        # passes and bail at the first imbalanced resource.
+        if cpu_percentages_override is not None and \
+           mem_percentages_override is not None and \
+           disk_percentages_override is not None and \
+           net_percentages_override is not None:
+            cpu_percentages = cpu_percentages_override
+            mem_percentages = mem_percentages_override
+            disk_percentages = disk_percentages_override
+            net_percentages = net_percentages_override
+        else:
+            cpu_percentages, mem_percentages, disk_percentages, net_percentages = \
+                self.get_resource_percentage_lists()
+
+        all_metrics_data = {
+            'cpu': cpu_percentages,
+            'memory': mem_percentages,
+            'disk': disk_percentages,
+            'network': net_percentages
+        }
+
+        if metrics_mask is None:
+            if metrics is None:
+                metrics_mask = ALL_METRICS_MASK
+            else:
+                metrics_mask = build_metrics_mask(metrics)
+
+        allowed_thresholds = self.get_thresholds(aggressiveness)
+        for resource_name, metric_bit in METRIC_BITS.items():
+            if not metrics_mask & metric_bit:
+                continue
+            percentages = all_metrics_data.get(resource_name, [])
+            if not percentages or len(percentages) < 2:
+                continue
+            resource_threshold = allowed_thresholds.get(resource_name)
+            if resource_threshold is None:
+                continue
+            if max(percentages) - min(percentages) > resource_threshold:
+                logger.debug(f"[LoadEvaluator] Resource '{resource_name}' imbalanced (spread > {resource_threshold:.2f}%); cluster not balanced.")
                 return False # Found an imbalanced resource
         return True # All resources are balanced
 
     def get_resource_usage_lists(self):
-        if not isinstance(self.hosts, list) or not all(isinstance(h, dict) for h in self.hosts if h is not None):
-            logger.error("[LoadEvaluator] self.hosts is not a list of dictionaries or contains None values.")
+        if not isinstance(self.hosts, list):
+            logger.error("[LoadEvaluator] self.hosts is not a list.")
             return [], [], [], []
 
-        cpu_usage = [metrics.get('cpu_usage', 0.0) for metrics in self.hosts if metrics]
-        mem_usage = [metrics.get('memory_usage', 0.0) for metrics in self.hosts if metrics]
-        disk_io = [metrics.get('disk_io_usage', 0.0) for metrics in self.hosts if metrics]
-        net_io = [metrics.get('network_io_usage', 0.0) for metrics in self.hosts if metrics]
-        
+        # Collect all four usage columns and their totals in one walk over the
+        # hosts instead of one attribute pass per resource plus separate sums
+        cpu_usage: List[float] = []
+        mem_usage: List[float] = []
+        disk_io: List[float] = []
+        net_io: List[float] = []
+        total_cpu = total_mem = total_disk = total_net = 0.0
+        for metrics in self.hosts:
+            if not metrics:
+                continue
+            cpu = getattr(metrics, 'cpu_usage', 0.0)
+            mem = getattr(metrics, 'memory_usage', 0.0)
+            disk = getattr(metrics, 'disk_io_usage', 0.0)
+            net = getattr(metrics, 'network_io_usage', 0.0)
+            cpu_usage.append(cpu)
+            mem_usage.append(mem)
+            disk_io.append(disk)
+            net_io.append(net)
+            total_cpu += cpu
+            total_mem += mem
+            total_disk += disk
+            total_net += net
+
         self.cluster_totals = {
-            'cpu': sum(cpu_usage),
-            'memory': sum(mem_usage),
-            'disk_io': sum(disk_io),
-            'network_io': sum(net_io)
+            'cpu': total_cpu,
+            'memory': total_mem,
+            'disk_io': total_disk,
+            'network_io': total_net
         }
-        
-        num_hosts = len([h for h in self.hosts if h])
+
+        num_hosts = len(cpu_usage)
         self.target_per_host = {
-            'cpu': self.cluster_totals['cpu'] / num_hosts if num_hosts > 0 else 0,
-            'memory': self.cluster_totals['memory'] / num_hosts if num_hosts > 0 else 0,
-            'disk_io': self.cluster_totals['disk_io'] / num_hosts if num_hosts > 0 else 0,
-            'network_io': self.cluster_totals['network_io'] / num_hosts if num_hosts > 0 else 0
+            'cpu': total_cpu / num_hosts if num_hosts > 0 else 0,
+            'memory': total_mem / num_hosts if num_hosts > 0 else 0,
+            'disk_io': total_disk / num_hosts if num_hosts > 0 else 0,
+            'network_io': total_net / num_hosts if num_hosts > 0 else 0
         }
-        
+
+        cpu_target = self.target_per_host['cpu']
+        mem_target = self.target_per_host['memory']
+        disk_target = self.target_per_host['disk_io']
+        net_target = self.target_per_host['network_io']
         self.resource_deviations = {
-            'cpu': [abs(usage - self.target_per_host['cpu']) for usage in cpu_usage],
-            'memory': [abs(usage - self.target_per_host['memory']) for usage in mem_usage],
-            'disk_io': [abs(usage - self.target_per_host['disk_io']) for usage in disk_io],
-            'network_io': [abs(usage - self.target_per_host['network_io']) for usage in net_io]
+            'cpu': [abs(usage - cpu_target) for usage in cpu_usage],
+            'memory': [abs(usage - mem_target) for usage in mem_usage],
+            'disk_io': [abs(usage - disk_target) for usage in disk_io],
+            'network_io': [abs(usage - net_target) for usage in net_io]
         }
         return cpu_usage, mem_usage, disk_io, net_io
 
@@ -217,41 +347,27 @@ class LoadEvaluator:
         Example structure: {host_name: {'cpu': %, 'memory': %, 'disk': %, 'network': %}, ...}
         """
         logger.debug("[LoadEvaluator] Generating all host resource percentages map.")
-        cpu_p, mem_p, disk_p, net_p = self.get_resource_percentage_lists()
-        host_names = []
-        if isinstance(self.hosts, list):
-            for i, host_data in enumerate(self.hosts):
-                if isinstance(host_data, dict):
-                    name = host_data.get('name')
-                    if name:
-                        host_names.append(name)
-                    else:
-                        logger.warning(f"[LoadEvaluator] Host at index {i} is missing a 'name' key. Using placeholder name.")
-                        host_names.append(f"unknown_host_{i}")
-                else:
-                    logger.warning(f"[LoadEvaluator] Host data at index {i} is not a dict. Using placeholder name.")
-                    host_names.append(f"invalid_host_data_{i}")
-        else:
+        if not isinstance(self.hosts, list):
             logger.error("[LoadEvaluator] self.hosts is not a list. Cannot generate host resource map.")
             return {}
 
-        if not (len(cpu_p) == len(mem_p) == len(disk_p) == len(net_p) == len(host_names)):
-            logger.error(f"[LoadEvaluator] Mismatch in lengths of percentage lists and host names. "
-                         f"Hosts: {len(host_names)}, CPU: {len(cpu_p)}, MEM: {len(mem_p)}, "
-                         f"DISK: {len(disk_p)}, NET: {len(net_p)}. Returning partial/empty map.")
-
+        # The percentage lists carry exactly one row per host (None hosts
+        # included), so one zipped pass builds the map — no separate name
+        # collection or length-mismatch handling needed.
+        cpu_p, mem_p, disk_p, net_p = self.get_resource_percentage_lists()
         result_map = {}
-        for i, hn in enumerate(host_names):
-            if i < len(cpu_p) and i < len(mem_p) and i < len(disk_p) and i < len(net_p):
-                result_map[hn] = {
-                    'cpu': cpu_p[i],
-                    'memory': mem_p[i],
-                    'disk': disk_p[i],
-                    'network': net_p[i],
-                }
-            else:
-                logger.warning(f"[LoadEvaluator] Data for host '{hn}' (index {i}) might be incomplete due to list length mismatch. Assigning empty metrics.")
-                result_map[hn] = {'cpu': 0, 'memory': 0, 'disk': 0, 'network': 0}
+        for i, (host_data, cpu, mem, disk, net) in enumerate(zip(self.hosts, cpu_p, mem_p, disk_p, net_p)):
+            name = getattr(host_data, 'name', None)
+            if not name:
+                logger.warning(f"[LoadEvaluator] Host at index {i} is missing a 'name'. Using placeholder name.")
+                name = f"unknown_host_{i}"
+            result_map[name] = {
+                'cpu': cpu,
+                'memory': mem,
+                'disk': disk,
+                'network': net,
+            }
 
-        logger.debug(f"[LoadEvaluator] Generated host resource percentages map: {result_map}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[LoadEvaluator] Generated host resource percentages map: {result_map}")
         return result_map
@@ -1,5 +1,6 @@
 from pyVmomi import vim
 import logging
+import time
 from typing import Dict, Optional, Any, List, Tuple
 
 logger = logging.getLogger('fdrs')
@@ -8,6 +9,21 @@ logger = logging.getLogger('fdrs')
 DEFAULT_DISK_IO_CAPACITY = 4000  # MBps
 DEFAULT_NETWORK_CAPACITY = 1250.0  # MBps
 
+# vCenter's realtime performance interval: 20-second samples served from the
+# in-memory ring buffer for both hosts and VMs. Combined with maxSample=1
+# this returns the latest sample without touching the historical DB.
+REALTIME_INTERVAL_ID = 20
+
+# Counter name->ID mapping is stable for a vCenter session, and hardware
+# capacities (CPU cores/MHz, memory size, pNIC link speeds) do not change at
+# runtime. Both are cached at module scope so the per-cycle ResourceMonitor
+# instances created by the scheduler loop do not redo the work. The capacity
+# cache carries a timestamp so a long-running daemon eventually picks up
+# hardware changes (e.g. after host maintenance).
+_shared_counter_map: Optional[Dict[str, Optional[int]]] = None
+_host_capacity_cache: Dict[str, Tuple[float, Dict[str, float]]] = {}
+HOST_CAPACITY_REFRESH_SECONDS = 3600
+
 # Metrics we need to fetch
 METRICS_MAP = {
     "cpu_usage": "cpu.usage",       # Percentage (0-10000)
@@ -16,6 +32,15 @@ METRICS_MAP = {
     "network_io_usage": "net.usage" # KBps
 }
 
+# Raw counter value -> reported unit: percent*100 counters divide by 100,
+# KBps counters divide by 1024 (to MBps)
+_METRIC_DIVISORS = {
+    "cpu_usage": 100.0,
+    "memory_usage": 100.0,
+    "disk_io_usage": 1024.0,
+    "network_io_usage": 1024.0,
+}
+
 
 class ResourceMonitor:
     """
@@ -26,9 +51,12 @@ class ResourceMonitor:
     __slots__ = ('service_instance', 'performance_manager', 'counter_map', 'config', '_metric_cache')
 
     def __init__(self, service_instance, config=None):
+        global _shared_counter_map
         self.service_instance = service_instance
         self.performance_manager = service_instance.content.perfManager
-        self.counter_map = self._build_counter_map()
+        if _shared_counter_map is None:
+            _shared_counter_map = self._build_counter_map()
+        self.counter_map = _shared_counter_map
         self.config = config
         self._metric_cache: Dict[str, Dict] = {}  # Cache for repeated queries
 
@@ -53,7 +81,7 @@ class ResourceMonitor:
             
         return counter_map
 
-    def _get_batch_performance_data(self, entities: List, metric_names: List[str], interval: int = 20) -> Dict[str, Dict[str, float]]:
+    def _get_batch_performance_data(self, entities: List, metric_names: List[str], interval: int = REALTIME_INTERVAL_ID) -> Dict[str, Dict[str, float]]:
         """
         Batch query performance data for multiple entities and metrics.
         
@@ -175,8 +203,84 @@ class ResourceMonitor:
             }
         return processed
 
-    def _get_performance_data(self, entity, metric_name, interval=20):
-        content = self.service_instance.RetrieveContent() 
+    def get_batch_host_metrics(self, hosts: List) -> Dict[str, Dict[str, float]]:
+        """
+        Get usage and capacity metrics for multiple hosts in a single batch query.
+
+        Collapses the per-host QueryPerf calls into one SOAP round trip, the
+        same way get_batch_vm_metrics does for VMs.
+
+        Args:
+            hosts: List of Host managed objects
+
+        Returns:
+            Dict mapping host names to their metrics (same shape as get_host_metrics)
+        """
+        metric_names = list(METRICS_MAP.values())
+        raw_metrics = self._get_batch_performance_data(hosts, metric_names)
+
+        processed = {}
+        for host in hosts:
+            host_name = getattr(host, 'name', None)
+            if not host_name:
+                continue
+            metrics = raw_metrics.get(host_name, {})
+            host_metrics = {
+                'cpu_usage': (metrics.get('cpu.usage', 0) or 0) / 100.0,
+                'memory_usage': (metrics.get('mem.usage', 0) or 0) / 100.0,
+                'disk_io_usage': (metrics.get('disk.usage', 0) or 0) / 1024.0,  # KBps to MBps
+                'network_io_usage': (metrics.get('net.usage', 0) or 0) / 1024.0  # KBps to MBps
+            }
+            self._add_host_capacity_metrics(host, host_metrics)
+            processed[host_name] = host_metrics
+        return processed
+
+    def get_metrics_bulk(self, vms: List, hosts: List) -> Tuple[Dict[str, Dict[str, float]],
+                                                               Dict[str, Dict[str, float]]]:
+        """
+        Fetch usage metrics for all VMs and hosts with a single QueryPerf call.
+
+        QueryPerf accepts one QuerySpec per entity, so combining both entity
+        lists amortizes the SOAP envelope and TLS round trip over the whole
+        collection cycle instead of one call per entity class.
+
+        Args:
+            vms: List of VM managed objects
+            hosts: List of Host managed objects
+
+        Returns:
+            Tuple of (vm_metrics_map, host_metrics_map), same shapes as
+            get_batch_vm_metrics and get_batch_host_metrics respectively.
+        """
+        metric_names = list(METRICS_MAP.values())
+        raw_metrics = self._get_batch_performance_data(list(vms) + list(hosts), metric_names)
+
+        def _convert(metrics: Dict[str, float]) -> Dict[str, float]:
+            return {
+                'cpu_usage': (metrics.get('cpu.usage', 0) or 0) / 100.0,
+                'memory_usage': (metrics.get('mem.usage', 0) or 0) / 100.0,
+                'disk_io_usage': (metrics.get('disk.usage', 0) or 0) / 1024.0,  # KBps to MBps
+                'network_io_usage': (metrics.get('net.usage', 0) or 0) / 1024.0  # KBps to MBps
+            }
+
+        vm_map = {}
+        for vm in vms:
+            vm_name = getattr(vm, 'name', None)
+            if vm_name and vm_name in raw_metrics:
+                vm_map[vm_name] = _convert(raw_metrics[vm_name])
+
+        host_map = {}
+        for host in hosts:
+            host_name = getattr(host, 'name', None)
+            if not host_name:
+                continue
+            host_metrics = _convert(raw_metrics.get(host_name, {}))
+            self._add_host_capacity_metrics(host, host_metrics)
+            host_map[host_name] = host_metrics
+
+        return vm_map, host_map
+
+    def _get_performance_data(self, entity, metric_name, interval=REALTIME_INTERVAL_ID):
         metric_id = self.counter_map.get(metric_name)
 
         entity_name_for_log = getattr(entity, 'name', str(entity))
@@ -219,59 +323,38 @@ class ResourceMonitor:
 
     def get_vm_metrics(self, vm):
         vm_metrics = {}
-        metrics_to_fetch = { 				# Renamed 'metrics' to 'metrics_to_fetch' to avoid confusion
-            "cpu_usage": "cpu.usage",       # Percentage
-            "memory_usage": "mem.usage",    # Percentage
-            "disk_io_usage": "disk.usage",  # KBps (disk.read/write aggregated)
-            "network_io_usage": "net.usage" # KBps (tx/rx aggregated)
-        }
-
-        for metric_key, counter_key in metrics_to_fetch.items():
+        for metric_key, counter_key in METRICS_MAP.items():
             scalar_metric_value = self._get_performance_data(vm, counter_key)
 
             if scalar_metric_value is None:
                 scalar_metric_value = 0.0
 
-            if metric_key == "cpu_usage":
-                vm_metrics[metric_key] = scalar_metric_value / 100.0
-            elif metric_key == "memory_usage":
-                vm_metrics[metric_key] = scalar_metric_value / 100.0
-            elif metric_key == "disk_io_usage": # Counter is in KBps
-                vm_metrics[metric_key] = scalar_metric_value / 1024.0 # Convert to MBps
-            elif metric_key == "network_io_usage": # Counter is in KBps
-                vm_metrics[metric_key] = scalar_metric_value / 1024.0 # Convert to MBps
-            else:
-                vm_metrics[metric_key] = scalar_metric_value
+            vm_metrics[metric_key] = scalar_metric_value / _METRIC_DIVISORS.get(metric_key, 1.0)
 
         return vm_metrics
 
     def get_host_metrics(self, host):
         host_metrics = {}
-        metrics_to_fetch = {
-            "cpu_usage": "cpu.usage",       # Percentage
-            "memory_usage": "mem.usage",    # Percentage
-            "disk_io_usage": "disk.usage",  # KBps
-            "network_io_usage": "net.usage" # KBps
-        }
-
-        for metric_key, counter_key in metrics_to_fetch.items():
+        for metric_key, counter_key in METRICS_MAP.items():
             scalar_metric_value = self._get_performance_data(host, counter_key)
 
-            if scalar_metric_value is None: 
+            if scalar_metric_value is None:
                 scalar_metric_value = 0.0
 
-            if metric_key == "cpu_usage":      # Counter value is 0-10000
-                host_metrics[metric_key] = scalar_metric_value / 100.0
-            elif metric_key == "memory_usage": # Counter value is 0-10000
-                host_metrics[metric_key] = scalar_metric_value / 100.0
-            elif metric_key == "disk_io_usage": # KBps
-                host_metrics[metric_key] = scalar_metric_value / 1024.0 # Convert to MBps
-            elif metric_key == "network_io_usage": # KBps
-                host_metrics[metric_key] = scalar_metric_value / 1024.0 # Convert to MBps
-            else:
-                host_metrics[metric_key] = scalar_metric_value
+            host_metrics[metric_key] = scalar_metric_value / _METRIC_DIVISORS.get(metric_key, 1.0)
 
-        # Add capacity information
+        self._add_host_capacity_metrics(host, host_metrics)
+
+        return host_metrics
+
+    def _add_host_capacity_metrics(self, host, host_metrics) -> None:
+        """Populate capacity entries (CPU/memory/disk I/O/network) on a host metrics dict."""
+        host_moid = getattr(host, '_moId', None)
+        if host_moid is not None:
+            cached = _host_capacity_cache.get(host_moid)
+            if cached is not None and time.monotonic() - cached[0] < HOST_CAPACITY_REFRESH_SECONDS:
+                host_metrics.update(cached[1])
+                return
         try:
             host_metrics["cpu_capacity"] = host.summary.hardware.numCpuCores * host.summary.hardware.cpuMhz
             host_metrics["memory_capacity"] = host.summary.hardware.memorySize / (1024 * 1024)  # Convert B to MB
@@ -294,14 +377,13 @@ class ResourceMonitor:
                 pnics = host.config.network.pnic
                 try:
                     valid_link_speeds = []
-                    for pnic_obj in pnics: 
-                        if hasattr(pnic_obj, 'linkSpeed') and \
-                           pnic_obj.linkSpeed is not None and \
-                           hasattr(pnic_obj.linkSpeed, 'speedMb') and \
-                           isinstance(pnic_obj.linkSpeed.speedMb, int):
-                            valid_link_speeds.append(pnic_obj.linkSpeed.speedMb)
-                        elif hasattr(pnic_obj, 'linkSpeed') and pnic_obj.linkSpeed is not None and hasattr(pnic_obj.linkSpeed, 'speedMb'):
-                            logger.warning(f"Host '{host.name}', pNIC '{pnic_obj.device}': linkSpeed.speedMb found but is not an integer (type: {type(pnic_obj.linkSpeed.speedMb)} value: {pnic_obj.linkSpeed.speedMb}). Skipping this pNIC for network capacity sum.")
+                    for pnic_obj in pnics:
+                        link_speed = getattr(pnic_obj, 'linkSpeed', None)
+                        speed_mb = getattr(link_speed, 'speedMb', None) if link_speed is not None else None
+                        if isinstance(speed_mb, int):
+                            valid_link_speeds.append(speed_mb)
+                        elif speed_mb is not None:
+                            logger.warning(f"Host '{host.name}', pNIC '{pnic_obj.device}': linkSpeed.speedMb found but is not an integer (type: {type(speed_mb)} value: {speed_mb}). Skipping this pNIC for network capacity sum.")
 
                     if valid_link_speeds:
                         total_link_speed_mbps = sum(valid_link_speeds) 
@@ -318,11 +400,18 @@ class ResourceMonitor:
                 logger.warning(f"Host '{host.name}': Could not retrieve pNIC information. Defaulting network capacity.")
             host_metrics["network_capacity"] = network_capacity_val
 
+            # Only successful lookups are cached; the defaulted error path
+            # below stays transient so the next cycle retries
+            if host_moid is not None:
+                _host_capacity_cache[host_moid] = (time.monotonic(), {
+                    key: host_metrics[key]
+                    for key in ("cpu_capacity", "memory_capacity",
+                                "disk_io_capacity", "network_capacity")
+                })
+
         except Exception as e:
             logger.error(f"[ResourceMonitor.get_host_metrics] Error fetching capacity for host '{getattr(host, 'name', str(host))}': {e}. Capacities will be defaulted.")
             host_metrics["cpu_capacity"] = 0
             host_metrics["memory_capacity"] = 0
             host_metrics["disk_io_capacity"] = 1 # Used 1 to prevent potential division by zero
             host_metrics["network_capacity"] = 1 # Used 1 to prevent potential division by zero
-            
-        return host_metrics
@@ -1,6 +1,6 @@
 import logging
 import time
-from typing import List, Tuple, Optional
+from typing import Dict, List, Optional, Tuple
 from pyVmomi import vim
 
 logger = logging.getLogger('fdrs')
@@ -8,22 +8,36 @@ logger = logging.getLogger('fdrs')
 # Default timeout for vMotion operations (5 minutes)
 DEFAULT_MIGRATION_TIMEOUT = 300
 
+# Default cap on concurrently running vMotions (respects vCenter throttling)
+DEFAULT_MAX_CONCURRENT_MIGRATIONS = 4
+
 
 class Scheduler:
-    """Executes planned VM migrations via vMotion."""
-    
-    __slots__ = ('connection_manager', 'dry_run', 'si', 'timeout')
+    """Executes planned VM migrations via vMotion.
+
+    Migrations are submitted in concurrent batches (capped at max_concurrent)
+    and awaited with a single PropertyCollector.WaitForUpdatesEx loop instead
+    of polling each task to completion sequentially.
+    """
 
-    def __init__(self, connection_manager, dry_run: bool = False, timeout: int = DEFAULT_MIGRATION_TIMEOUT):
+    __slots__ = ('connection_manager', 'dry_run', 'si', 'timeout', 'max_concurrent')
+
+    def __init__(self, connection_manager, dry_run: bool = False, timeout: int = DEFAULT_MIGRATION_TIMEOUT,
+                 max_concurrent: int = DEFAULT_MAX_CONCURRENT_MIGRATIONS):
         self.connection_manager = connection_manager
         self.dry_run = dry_run
         self.si = connection_manager.service_instance
         self.timeout = timeout
+        self.max_concurrent = max(1, max_concurrent)
 
-    def execute_migrations(self, migrations: List[Tuple]) -> Tuple[int, int]:
+    def execute_migrations(self, migrations: List) -> Tuple[int, int]:
         """
         Perform or simulate the VM migrations.
-        
+
+        Args:
+            migrations: MigrationPlan entries from the planner (read via
+                .vm / .target_host)
+
         Returns:
             Tuple of (successful_count, failed_count)
         """
@@ -32,79 +46,162 @@ class Scheduler:
             return (0, 0)
 
         mode = "DRY-RUN" if self.dry_run else "REAL"
-        logger.info(f"[Scheduler] Executing {len(migrations)} planned migrations. Mode: {mode}")
+        logger.info(f"[Scheduler] Executing {len(migrations)} planned migrations. Mode: {mode} "
+                    f"(max {self.max_concurrent} concurrent)")
 
         success_count = 0
         fail_count = 0
+        pending: List[Tuple] = []
 
-        for vm, target_host in migrations:
+        for plan in migrations:
+            vm, target_host = plan.vm, plan.target_host
             if hasattr(vm, 'config') and getattr(vm.config, 'template', False):
                 logger.info(f"[Scheduler] Skipping template VM '{vm.name}'")
                 continue
+            if self.dry_run:
+                logger.info(f"[DRY-RUN] Would migrate VM '{vm.name}' -> Host '{target_host.name}'")
+                success_count += 1
+            else:
+                pending.append((vm, target_host))
+
+        # Submit real migrations in concurrent batches
+        for batch_start in range(0, len(pending), self.max_concurrent):
+            batch = pending[batch_start:batch_start + self.max_concurrent]
+            batch_success, batch_fail = self._execute_batch(batch)
+            success_count += batch_success
+            fail_count += batch_fail
+
+        logger.info(f"[Scheduler] Migration summary: {success_count} successful, {fail_count} failed")
+        return (success_count, fail_count)
+
+    def _execute_batch(self, batch: List[Tuple]) -> Tuple[int, int]:
+        """
+        Fire vMotion tasks for one batch without waiting in between, then await
+        them all with a single WaitForUpdatesEx loop.
+
+        Returns:
+            Tuple of (successful_count, failed_count) for the batch
+        """
+        success_count = 0
+        fail_count = 0
+        tasks = []
+        task_labels: Dict[str, str] = {}
+
+        for vm, target_host in batch:
             try:
-                if self.dry_run:
-                    logger.info(f"[DRY-RUN] Would migrate VM '{vm.name}' -> Host '{target_host.name}'")
-                    success_count += 1
-                else:
-                    self._migrate_vm(vm, target_host)
-                    success_count += 1
+                task = self._start_migration(vm, target_host)
+                tasks.append(task)
+                task_labels[str(task)] = f"vMotion {vm.name}"
             except Exception as e:
-                logger.error(f"[Scheduler] Failed to migrate VM '{vm.name}': {e}")
+                logger.error(f"[Scheduler] Failed to start migration of VM '{vm.name}': {e}")
+                fail_count += 1
+
+        if not tasks:
+            return (success_count, fail_count)
+
+        try:
+            results = self._wait_for_tasks(tasks, task_labels)
+        except Exception as e:
+            logger.error(f"[Scheduler] Error while waiting for migration tasks: {e}")
+            return (success_count, fail_count + len(tasks))
+
+        for task_key, error in results.items():
+            label = task_labels.get(task_key, task_key)
+            if error is None:
+                logger.info(f"[Scheduler] Task '{label}' completed successfully.")
+                success_count += 1
+            else:
+                logger.error(f"[Scheduler] Task '{label}' failed: {error}")
                 fail_count += 1
 
-        logger.info(f"[Scheduler] Migration summary: {success_count} successful, {fail_count} failed")
         return (success_count, fail_count)
 
-    def _migrate_vm(self, vm, target_host) -> None:
+    def _start_migration(self, vm, target_host):
         """
-        Actually migrate a VM to another host using vMotion.
-        
+        Issue the vMotion RelocateVM task for a VM without waiting for it.
+
+        Returns:
+            The started vim.Task
+
         Raises:
-            Exception: If migration fails or times out
+            Exception: If task submission fails
         """
         source_host = vm.runtime.host.name if vm.runtime.host else "Unknown"
         logger.info(f"[Scheduler] Starting vMotion: '{vm.name}' from '{source_host}' -> '{target_host.name}'")
 
         relocate_spec = vim.vm.RelocateSpec()
         relocate_spec.host = target_host
-        
+
         # Get resource pool from target host's cluster
         if hasattr(target_host.parent, 'resourcePool'):
             relocate_spec.pool = target_host.parent.resourcePool
 
-        task = vm.RelocateVM_Task(spec=relocate_spec)
-        self._wait_for_task(task, f"vMotion {vm.name}")
+        return vm.RelocateVM_Task(spec=relocate_spec)
 
-        logger.info(f"[Scheduler] vMotion completed: '{vm.name}' now on '{target_host.name}'")
-
-    def _wait_for_task(self, task, action_name: str, poll_interval: float = 1.0) -> None:
+    def _wait_for_tasks(self, tasks: List, task_labels: Dict[str, str]) -> Dict[str, Optional[str]]:
         """
-        Wait for a vCenter task to complete with timeout.
-        
+        Wait for a set of vCenter tasks using PropertyCollector.WaitForUpdatesEx,
+        which blocks server-side until task state changes instead of client polling.
+
         Args:
-            task: vCenter task object
-            action_name: Description of the task for logging
-            poll_interval: Seconds between status checks
-        
+            tasks: vim.Task objects to wait on
+            task_labels: Task key -> human-readable label for logging
+
+        Returns:
+            Dict mapping task keys to None (success) or an error string
+
         Raises:
-            TimeoutError: If task exceeds timeout
-            Exception: If task fails
+            TimeoutError: If tasks exceed the configured timeout
         """
-        logger.debug(f"[Scheduler] Waiting for task: {action_name}...")
-        elapsed = 0
-        
-        while task.info.state in ('running', 'queued'):
-            if elapsed >= self.timeout:
-                raise TimeoutError(f"Task '{action_name}' timed out after {self.timeout}s")
-            time.sleep(poll_interval)
-            elapsed += poll_interval
-            
-            # Log progress every 30 seconds
-            if elapsed % 30 == 0:
-                logger.debug(f"[Scheduler] Task '{action_name}' still running ({elapsed}s elapsed)")
-
-        if task.info.state == 'success':
-            logger.debug(f"[Scheduler] Task '{action_name}' completed in {elapsed}s")
-        else:
-            error_msg = str(task.info.error) if task.info.error else "Unknown error"
-            raise Exception(f"Task '{action_name}' failed: {error_msg}")
+        property_collector = self.si.content.propertyCollector
+        filter_spec = vim.PropertyCollector.FilterSpec(
+            objectSet=[vim.PropertyCollector.ObjectSpec(obj=task) for task in tasks],
+            propSet=[vim.PropertyCollector.PropertySpec(type=vim.Task, pathSet=['info.state', 'info.error'])]
+        )
+        pc_filter = property_collector.CreateFilter(filter_spec, True)
+
+        remaining = {str(task) for task in tasks}
+        results: Dict[str, Optional[str]] = {}
+        version = ''
+        deadline = time.monotonic() + self.timeout
+        wait_options = vim.PropertyCollector.WaitOptions(maxWaitSeconds=10)
+
+        try:
+            while remaining:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"{len(remaining)} migration task(s) timed out after {self.timeout}s: "
+                                       f"{[task_labels.get(k, k) for k in remaining]}")
+
+                update = property_collector.WaitForUpdatesEx(version, wait_options)
+                if update is None:
+                    continue  # No state change within maxWaitSeconds; re-check deadline
+                version = update.version
+
+                for filter_update in (update.filterSet or []):
+                    for object_update in (filter_update.objectSet or []):
+                        task_key = str(object_update.obj)
+                        if task_key not in remaining:
+                            continue
+                        state = None
+                        error = None
+                        for change in (object_update.changeSet or []):
+                            if change.name == 'info.state':
+                                state = change.val
+                            elif change.name == 'info.error':
+                                error = change.val
+                            elif change.name == 'info' and change.val:
+                                state = change.val.state
+                                error = change.val.error
+                        if state == vim.TaskInfo.State.success:
+                            remaining.discard(task_key)
+                            results[task_key] = None
+                        elif state == vim.TaskInfo.State.error:
+                            remaining.discard(task_key)
+                            results[task_key] = str(error) if error else "Unknown error"
+        finally:
+            try:
+                pc_filter.Destroy()
+            except Exception as e:
+                logger.debug(f"[Scheduler] Could not destroy property filter: {e}")
+
+        return results